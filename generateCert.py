@@ -1,14 +1,17 @@
 from tkinter import *
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
+from io import BytesIO
 from textwrap import wrap
 from datetime import datetime
 import qrcode
 from PIL import Image, ImageTk
-import os
 from tkinter import filedialog, messagebox
 import argparse
+import json
 import sys
+from functools import lru_cache
 
 TODAY = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
 # Defaults; can be overridden by CLI args passed from the UI
@@ -45,59 +48,91 @@ except Exception:
     pass
 
 
-def generate_qr_code():
-    """Generate QR code containing certificate data as JSON"""
-    cert_data = {
+# Custom page size
+PAGE_SIZE = (595.2755905511812, 741.8897637795277)
+# Signature wrap width in characters (wrap text like Tkinter width=500)
+MAX_TEXT_WIDTH = int((PAGE_SIZE[0] - 2 * 60) / 6)
+
+
+def current_cert():
+    """Certificate fields passed in for this session"""
+    return {
         "cert_id": cert_id,
         "device_model": device_model,
         "device_SNO": device_SNO,
         "wipe_method": wipe_method,
         "wipe_timestamp": wipe_timestamp,
         "digital_signature": digital_signature,
-        "issuer": "Secure Wipe - The Firmware",
-        "certificate_type": "Data Wiping Certificate"
     }
-    
-    """Generate a QR code from the given data (string) and save as an image file."""
+
+
+def _qr_payload(cert):
+    cert_data = dict(cert)
+    cert_data["issuer"] = "Secure Wipe - The Firmware"
+    cert_data["certificate_type"] = "Data Wiping Certificate"
+    return tuple(sorted(cert_data.items()))
+
+
+def generate_qr_code(cert=None):
+    """Generate QR code containing certificate data as JSON"""
+    return _make_qr(_qr_payload(cert or current_cert()))
+
+
+@lru_cache(maxsize=4)
+def _encode_qr(payload):
+    """Encode a certificate payload into a QR matrix (shared by preview and PDF)"""
+    cert_data = dict(payload)
     qr = qrcode.QRCode(
-        version=1,  # auto size if None
+        version=None,  # smallest version that fits the payload
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=10,
         border=4,
     )
-    qr.add_data(cert_data)
+    qr.add_data(json.dumps(cert_data, separators=(",", ":")))
     qr.make(fit=True)
+    return qr
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    return img
 
+@lru_cache(maxsize=4)
+def _make_qr(payload):
+    """Build the PIL QR image for a certificate payload.
 
+    Returns (original, 200x200 preview).
+    """
+    img = _encode_qr(payload).make_image(fill_color="black", back_color="white")
+    return img, img.resize((200, 200), Image.Resampling.NEAREST)
 
-def generate_pdf():
-    file_path = filedialog.asksaveasfilename(
-        title="Save Certificate As",
-        defaultextension=".pdf",
-        initialfile=f"Demo_Certificate({cert_id}).pdf",
-        filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
-    )
-    if not file_path:  # if user cancels
-        return
-    
-    # Custom page size
-    custom_pagesize = (595.2755905511812, 741.8897637795277)
-    c = canvas.Canvas(file_path, pagesize=custom_pagesize)
-    width, height = custom_pagesize
 
-    # Border (like Tkinter canvas border)
+
+@lru_cache(maxsize=4)
+def _qr_png(payload):
+    """PNG bytes of the QR for a payload, shared by every page that uses it"""
+    # Reuses the PIL image already built for the preview
+    buf = BytesIO()
+    _make_qr(payload)[0].save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=16)
+def _signature_lines(signature):
+    return wrap(signature, MAX_TEXT_WIDTH)
+
+
+def _draw_cert_template(c):
+    """Draw the static page chrome; generate_pdfs records it once as a form"""
+    width, height = PAGE_SIZE
+
+    # One line width for border and separator
     c.setLineWidth(2)
-    c.rect(30, 30, width - 60, height - 60)
+
+    # Border (like Tkinter canvas border)
+    c.rect(30, 30, width - 60, height - 60, stroke=1, fill=0)
 
     # Header
     c.setFont("Times-Bold", 24)
     c.drawCentredString(width / 2, height - 80, "Secure Wipe - The Firmware")
 
     # Separator line
-    c.setLineWidth(2)
     c.line(50, height - 95, width - 50, height - 95)
 
     # Title
@@ -111,61 +146,82 @@ def generate_pdf():
     c.drawCentredString(width / 2, height - 185,
                         "and permanently wiped.")
 
-    # Certificate details (match Tkinter layout)
+    # Certificate detail labels (match Tkinter layout)
     left_x = 60
     right_x = width / 2 + 30
-
-    # Certificate ID
+    labels = [
+        (left_x, height - 230, "Certificate ID"),
+        (left_x, height - 270, "Device Model"),
+        (left_x, height - 310, "Wipe Method"),
+        (right_x, height - 310, "Timestamp"),
+        (left_x, height - 360, "Digital Signature"),
+    ]
     c.setFont("Helvetica-Bold", 10)
-    c.drawString(left_x, height - 230, "Certificate ID")
-    c.setFont("Helvetica", 12)
-    c.drawString(left_x, height - 245, cert_id)
+    for x, y, text in labels:
+        c.drawString(x, y, text)
 
-    # Device info
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(left_x, height - 270, "Device Model")
-    c.setFont("Helvetica", 12)
-    c.drawString(left_x, height - 285, f"{device_model}(SNO. - {device_SNO})")
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawCentredString(width / 2, 150, "(Scan QR code for certificate data)")
 
-    # Wipe Method
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(left_x, height - 310, "Wipe Method")
-    c.setFont("Helvetica", 12)
-    c.drawString(left_x, height - 325, wipe_method)
+    # Footer
+    c.drawCentredString(width / 2, 100, "This is a system-generated certificate")
 
-    # Timestamp
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(right_x, height - 310, "Timestamp")
+
+def _draw_cert_page(c, cert):
+    """Draw one certificate on the current page of canvas c"""
+    width, height = PAGE_SIZE
+
+    # Static chrome is referenced, not re-emitted, on every page
+    c.doForm("cert_template")
+
+    # Certificate details (match Tkinter layout)
+    left_x = 60
+    right_x = width / 2 + 30
+    values = [
+        (left_x, height - 245, cert["cert_id"]),
+        (left_x, height - 285, f"{cert['device_model']}(SNO. - {cert['device_SNO']})"),
+        (left_x, height - 325, cert["wipe_method"]),
+        (right_x, height - 325, cert["wipe_timestamp"]),
+    ]
     c.setFont("Helvetica", 12)
-    c.drawString(right_x, height - 325, wipe_timestamp)
+    for x, y, text in values:
+        c.drawString(x, y, text)
 
     # Digital signature section
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(left_x, height - 360, "Digital Signature")
     c.setFont("Helvetica", 8)
-
-    max_text_width = int((width - 2 * left_x) / 6)  # wrap text like Tkinter width=500
-    for i, line in enumerate(wrap(digital_signature, max_text_width)):
+    for i, line in enumerate(_signature_lines(cert["digital_signature"])):
         c.drawString(left_x, height - 375 - (i * 12), line)
 
     # QR code centered
-    qr_img = generate_qr_code()
-    qr_img.save("temp_qr.png")
+    qr_reader = ImageReader(BytesIO(_qr_png(_qr_payload(cert))))
     qr_w, qr_h = 200, 200
-    c.drawImage("temp_qr.png", (width - qr_w) / 2, 160, width=qr_w, height=qr_h,
+    c.drawImage(qr_reader, (width - qr_w) / 2, 160, width=qr_w, height=qr_h,
                 preserveAspectRatio=True, mask='auto')
 
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawCentredString(width / 2, 150, "(Scan QR code for certificate data)")
-
-    # Footer
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawCentredString(width / 2, 100, "This is a system-generated certificate")
 
+def generate_pdfs(certs, file_path):
+    """Write one page per certificate dict into a single PDF"""
+    c = canvas.Canvas(file_path, pagesize=PAGE_SIZE)
+    c.beginForm("cert_template")
+    _draw_cert_template(c)
+    c.endForm()
+    for cert in certs:
+        _draw_cert_page(c, cert)
+        c.showPage()
     c.save()
 
-    if os.path.exists("temp_qr.png"):
-        os.remove("temp_qr.png")
+
+def generate_pdf():
+    file_path = filedialog.asksaveasfilename(
+        title="Save Certificate As",
+        defaultextension=".pdf",
+        initialfile=f"Demo_Certificate({cert_id}).pdf",
+        filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+    )
+    if not file_path:  # if user cancels
+        return
+
+    generate_pdfs([current_cert()], file_path)
 
 
 # ---------------- Tkinter UI ----------------
@@ -197,23 +253,26 @@ cert_canvas.create_text(275, 175, text="and permanently wiped.", font=("Arial",
 # Certificate details in 2x2 grid
 #------------------------------------------------------------------------
 
+# Field items are kept by name so update_cert() can edit them in place
+cert_items = {}
+
 # Top row
 cert_canvas.create_text(40, 210, text="Certificate ID", font=("Arial", 10, "bold"), anchor="w")
-cert_canvas.create_text(40, 228, text=cert_id, font=("Arial", 12), anchor="w")
+cert_items["cert_id"] = cert_canvas.create_text(40, 228, text=cert_id, font=("Arial", 12), anchor="w")
 
 cert_canvas.create_text(40, 250, text="Device info", font=("Arial", 10, "bold"), anchor="w")
-cert_canvas.create_text(40, 268, text=f"{device_model} (SNO. - {device_SNO})", font=("Arial", 12), anchor="w")
+cert_items["device"] = cert_canvas.create_text(40, 268, text=f"{device_model} (SNO. - {device_SNO})", font=("Arial", 12), anchor="w")
 
 # Bottom row
 cert_canvas.create_text(40, 290, text="Wipe Method", font=("Arial", 10, "bold"), anchor="w")
-cert_canvas.create_text(40, 308, text=wipe_method, font=("Arial", 12), anchor="w")
+cert_items["wipe_method"] = cert_canvas.create_text(40, 308, text=wipe_method, font=("Arial", 12), anchor="w")
 
 cert_canvas.create_text(300, 290, text="Timestamp", font=("Arial", 10, "bold"), anchor="w")
-cert_canvas.create_text(300, 308, text=wipe_timestamp, font=("Arial", 12), anchor="w")
+cert_items["wipe_timestamp"] = cert_canvas.create_text(300, 308, text=wipe_timestamp, font=("Arial", 12), anchor="w")
 
 # Digital Signature (spans full width below grid)
 cert_canvas.create_text(40, 335, text="Digital Signature", font=("Arial", 10, "bold"), anchor="w")
-cert_canvas.create_text(40, 353, text=digital_signature, font=("Arial", 8), width=500, anchor="w")
+cert_items["digital_signature"] = cert_canvas.create_text(40, 353, text=digital_signature, font=("Arial", 8), width=500, anchor="w")
 
 
 #------------------------------------------------------------------------
@@ -221,10 +280,8 @@ cert_canvas.create_text(40, 353, text=digital_signature, font=("Arial", 8), widt
 # Generate and display QR code in the UI
 def display_qr_code():
     """Display QR code on the canvas"""
-    qr_img = generate_qr_code()
-    
-    # Resize QR code for display
-    qr_img = qr_img.resize((200, 200), Image.Resampling.LANCZOS)
+    # Cached 200x200 variant, resized once per payload
+    _, qr_img = generate_qr_code()
     
     # Convert to PhotoImage for tkinter
     qr_photo = ImageTk.PhotoImage(qr_img)
@@ -232,14 +289,51 @@ def display_qr_code():
     # Store reference to prevent garbage collection
     cert_canvas.qr_photo = qr_photo
     
+    # Swap the image on the existing item after the first draw
+    if "qr" in cert_items:
+        cert_canvas.itemconfigure(cert_items["qr"], image=qr_photo)
+        return
+
     # Display QR code on canvas
-    cert_canvas.create_image(275, 480, image=qr_photo)
+    cert_items["qr"] = cert_canvas.create_image(275, 480, image=qr_photo)
     
     # Add QR code label
     cert_canvas.create_text(275, 590, text="(Scan QR code for certificate data)", font=("Arial", 9, "italic"))
 
+
+def update_cert(fields):
+    """Apply changed certificate fields to the preview without recreating items"""
+    global cert_id, device_model, device_SNO, wipe_method, wipe_timestamp, digital_signature
+    cert = current_cert()
+    cert.update(fields)
+
+    # Nothing to redraw if the fields are what's already on screen
+    new_hash = hash(tuple(cert.values()))
+    if new_hash == cert_canvas._last_hash:
+        return
+    cert_canvas._last_hash = new_hash
+
+    cert_id = cert["cert_id"]
+    device_model = cert["device_model"]
+    device_SNO = cert["device_SNO"]
+    wipe_method = cert["wipe_method"]
+    wipe_timestamp = cert["wipe_timestamp"]
+    digital_signature = cert["digital_signature"]
+
+    texts = {
+        "cert_id": cert_id,
+        "device": f"{device_model} (SNO. - {device_SNO})",
+        "wipe_method": wipe_method,
+        "wipe_timestamp": wipe_timestamp,
+        "digital_signature": digital_signature,
+    }
+    for key, text in texts.items():
+        cert_canvas.itemconfigure(cert_items[key], text=text)
+    display_qr_code()
+
 # Display the QR code
 display_qr_code()
+cert_canvas._last_hash = hash(tuple(current_cert().values()))
 
 #------------------------------------------------------------------------
 
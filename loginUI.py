@@ -1,33 +1,109 @@
 from tkinter import *
 import subprocess
+import os
 import sys, json
+import re
+import threading
+import queue
 import requests
+from requests.adapters import HTTPAdapter
+
+# Keep-alive session so a retry after a typo reuses the TLS connection
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+# 9-49 URL-safe characters; anything else can't be a key, so never send it
+KEY_RE = re.compile(r"^[A-Za-z0-9_-]{9,49}$")
+
+# Verification results, handed from the worker thread to the Tk thread
+_verify_results = queue.Queue()
 
 def get_userDetails():
+    global _last_valid, _verifying
+    if _verifying:
+        return
     product_key = prod_key_entry.get().strip()
+    # Lock the button while the request is in flight; only the result
+    # clears _verifying and lets validate_inputs re-arm it
+    _verifying = True
+    _last_valid = None
+    submit_btn.config(state=DISABLED, bg="grey", fg="black")
+    l1.config(text="Verifying product key...", fg="yellow")
+    threading.Thread(target=_verify_key, args=(product_key,), daemon=True).start()
+    root.after(100, _poll_verify_result)
+
+
+def _verify_key(product_key):
+    """Runs off the Tk thread; hands the result back through _verify_results"""
     url = f"https://secure-wipe-2gyy.onrender.com/api/key/key-verify/{product_key}"
+    valid = None
     try:
     # Send GET request
-        response = requests.get(url, timeout=10)
-        print(response)
-        if response.json().get("valid"):
-            root.destroy()  # Close the login window
-            process = subprocess.Popen([sys.executable, "securewipeUI.py", "--product_key", product_key])
-            process.wait()
-        else:
-            l1.config(text="❌ Invalid Email or Product Key. Try again.", fg="red")
-            prod_key_entry.delete(0, END)  # Clear the entry field
-
-    except requests.exceptions.RequestException as e:
+        response = SESSION.get(url, timeout=(3, 10))
+        if os.environ.get("SECUREWIPE_DEBUG") == "1":
+            print(response)
+        valid = bool(response.json().get("valid"))
+    except Exception:
+        # Network trouble, a non-JSON reply, anything: report it as an
+        # error so the button is re-armed
+        valid = None
+    finally:
+        _verify_results.put((product_key, valid))
+
+
+def _poll_verify_result():
+    """Runs on the Tk thread until the worker has posted its result"""
+    try:
+        product_key, valid = _verify_results.get_nowait()
+    except queue.Empty:
+        root.after(100, _poll_verify_result)
+        return
+    _apply_verify_result(product_key, valid)
+
+
+def _apply_verify_result(product_key, valid):
+    global _verifying
+    _verifying = False
+    if valid:
+        root.destroy()  # Close the login window
+        args = [sys.executable, "securewipeUI.py", "--product_key", product_key]
+        # Replace this process so the login interpreter doesn't idle for the whole session.
+        # Windows emulates exec with a detached child, so keep waiting on it there.
+        if os.name != 'nt':
+            try:
+                os.execv(sys.executable, args)
+            except OSError:
+                pass
+        process = subprocess.Popen(args)
+        process.wait()
+    elif valid is None:
         l1.config(text="❌ Network error. Please try again later.", fg="red")
+        validate_inputs()
+    else:
+        l1.config(text="❌ Invalid Email or Product Key. Try again.", fg="red")
+        prod_key_entry.delete(0, END)  # Clear the entry field
+        validate_inputs()
 
 
 # ---------------- Validation Function ----------------
+_last_valid = None
+_validate_job = None
+_verifying = False  # a key check is in flight
+
 def validate_inputs(*args):
+    global _last_valid
+    # Typing during a key check must not re-enable Submit
+    if _verifying:
+        return
     product_key = prod_key_entry.get().strip()
     
-    # Product key length check
-    is_valid_key = 8 < len(product_key) < 50
+    # Product key length and charset check
+    is_valid_key = bool(KEY_RE.match(product_key))
+
+    # Only touch the button when the state actually flips
+    if is_valid_key == _last_valid:
+        return
+    _last_valid = is_valid_key
 
     # Enable button only if both valid
     if is_valid_key:
@@ -36,6 +112,14 @@ def validate_inputs(*args):
         submit_btn.config(state=DISABLED, bg="grey", fg="black")
 
 
+def schedule_validation(*args):
+    """Coalesce a burst of key presses into one validation 150ms later"""
+    global _validate_job
+    if _validate_job is not None:
+        root.after_cancel(_validate_job)
+    _validate_job = root.after(150, validate_inputs)
+
+
 BANNER = [
     "███████╗ ███████╗  ██████╗ ██╗   ██╗ ██████╗   ███████╗",
     "██╔════╝ ██╔════╝ ██╔════╝ ██║   ██║ ██╔══██╗  ██╔════╝",
@@ -86,8 +170,8 @@ text_widget.grid(row=0, column=0)
 
 # Insert banner centered
 text_widget.tag_configure("center", justify="center")
-for line in BANNER:
-    text_widget.insert(END, line + "\n", "center")
+text_widget.insert("1.0", "\n".join(BANNER) + "\n")
+text_widget.tag_add("center", "1.0", "end")
 text_widget.config(state=DISABLED)
 
 # === Login Frame (row 1) ===
@@ -101,7 +185,7 @@ Prod_key_label.grid(row=2, column=0, padx=10, pady=15, sticky="w")
 
 prod_key_entry = Entry(loginFrame, font=("Arial", 12), width=30, bg="white", fg="black", show="*")
 prod_key_entry.grid(row=2, column=1, padx=5, pady=15, sticky="ew")
-prod_key_entry.bind("<KeyRelease>", validate_inputs)
+prod_key_entry.bind("<KeyRelease>", schedule_validation)
 
 
 l1 = Label(loginFrame, text="*** enter valid Email id and Product Key. ***", fg="yellow", bg="#777B7E", font=("Arial", 10))
@@ -4,6 +4,9 @@ import sys
 import subprocess
 import platform
 
+# platform.system() probes uname/the Windows API on each call, so ask once
+_SYSTEM = platform.system()
+
 # Global variable to store disk information
 SELECTED_DISK_INFO = None
 
@@ -12,6 +15,13 @@ VENV_DIR = os.path.join(os.path.dirname(__file__), 'venv')
 
 def ensure_venv():
     """Check if running in virtual environment and set up if needed. Silent unless installation required."""
+    required_packages = ['tqdm', 'colorama', 'psutil']
+
+    # Fast path: dependencies already importable from this interpreter
+    import importlib.util
+    if all(importlib.util.find_spec(m) is not None for m in required_packages):
+        return
+
     in_venv = hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix)
     
     if not in_venv:
@@ -22,7 +32,7 @@ def ensure_venv():
                                  stdout=subprocess.DEVNULL if os.name != 'nt' else None)
             
         # Prepare paths - handle platform differences
-        if platform.system() == 'Windows':
+        if _SYSTEM == 'Windows':
             pip = os.path.join(VENV_DIR, 'Scripts', 'pip.exe')
             python_bin = os.path.join(VENV_DIR, 'Scripts', 'python.exe')
         else:
@@ -38,30 +48,23 @@ def ensure_venv():
             subprocess.check_call([sys.executable, '-m', 'venv', VENV_DIR])
         
         # Check if requirements are installed silently
-        required_packages = ['tqdm', 'colorama', 'psutil']
-        missing_packages = []
-        
-        # Use subprocess.DEVNULL to hide output during checking
-        for package in required_packages:
-            try:
-                # Check if package is installed silently
-                result = subprocess.run(
-                    [pip, 'show', package], 
-                    stdout=subprocess.DEVNULL, 
-                    stderr=subprocess.DEVNULL
-                )
-                if result.returncode != 0:
-                    missing_packages.append(package)
-            except Exception:
-                missing_packages.append(package)
+        # One `pip list` instead of a `pip show` per package
+        try:
+            result = subprocess.run(
+                [pip, 'list', '--format=freeze'],
+                capture_output=True,
+                text=True
+            )
+            installed = {line.split('==')[0].lower() for line in result.stdout.splitlines()}
+        except Exception:
+            installed = set()
+        missing_packages = [p for p in required_packages if p.lower() not in installed]
         
         # If any packages are missing, install them
         if missing_packages:
             print(f"Installing required packages: {', '.join(missing_packages)}")
-            # Upgrade pip first
-            subprocess.check_call([pip, 'install', '--upgrade', 'pip'])
-            # Install missing packages
-            subprocess.check_call([pip, 'install'] + missing_packages)
+            # Upgrade pip and install in one resolver run
+            subprocess.check_call([pip, 'install', '--upgrade', 'pip'] + missing_packages)
             
         # Execute the script within the virtual environment
         os.execv(python_bin, [python_bin] + sys.argv)
@@ -70,19 +73,35 @@ ensure_venv()
 
 # --- IMPORTS AFTER VENV ---
 import errno
-import argparse
+import functools
+import itertools
+import shutil
 import random
 import tempfile
+import textwrap
 import psutil
 import re
 import time
 import math
 import datetime
 import signal
-import atexit
+import contextlib
+import plistlib
+import json
+import mmap
+import ctypes
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from colorama import init, Fore, Style
 
+# Optional: ChaCha20 keystream for bulk random data, os.urandom otherwise
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+except ImportError:
+    Cipher = None
+
 # Initialize colorama for cross-platform color support
 init(autoreset=True)
 
@@ -97,16 +116,576 @@ WHITE  = Fore.WHITE
 RESET  = Style.RESET_ALL
 BRIGHT = Style.BRIGHT
 
+# Plain text when output goes to a pipe, log file or no console at all
+if sys.stdout is None or not sys.stdout.isatty():
+    RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = BRIGHT = ''
+
+# tqdm draws its bar on stderr; redirected, every redraw becomes another
+# line in the log, so there it only redraws every 30 seconds
+_BAR_INTERVAL = 0.25 if sys.stderr is not None and sys.stderr.isatty() else 30
+
+# Precompiled patterns used during drive enumeration
+_SIZE_RE = re.compile(r'([0-9,.]+)\s*([A-Za-z]+)')
+_TRAIL_DIGITS = re.compile(r'[0-9]+$')
+_WHOLE_DISK_RE = re.compile(r'^disk\d+$')
+
+# Patterns for parsing diskutil / fdisk / PowerShell output in format_disk;
+# all of it is ASCII, so skip Unicode matching
+_RX_DARWIN_SIZE = re.compile(r'Disk Size:\s+([0-9,]+)\s+Bytes\s+\(([^)]+)\)', re.ASCII)
+_RX_DARWIN_NAME = re.compile(r'Device / Media Name:\s+(.+)', re.ASCII)
+_RX_FDISK_SIZE = re.compile(r'Disk\s+.*?:\s+([0-9.]+\s+[A-Za-z]+)', re.ASCII)
+_RX_WIN_SIZE = re.compile(r'Size\s*:\s*([0-9,]+)', re.ASCII)
+_RX_WIN_MODEL = re.compile(r'FriendlyName\s*:\s*(.+)', re.ASCII)
+_RX_MOUNT = re.compile(r'Mount Point:\s+(.+)', re.ASCII)
+_RX_VOL = re.compile(r'Volume Name:\s+(.+)', re.ASCII)
+_RX_DISKNUM = re.compile(r'(\d+)$', re.ASCII)
+_RX_PARTITION = re.compile(r'disk\d+s\d+', re.ASCII)
+
+# Random data drawn up front when blocks are derived rather than generated
+_MASTER_RANDOM_SIZE = 16 * 1024 * 1024
+
+def random_stream(block_size, depth=1):
+    """
+    Return a callable that yields block_size fresh random bytes per call.
+    Uses a ChaCha20 keystream seeded from os.urandom when cryptography is
+    installed, so bulk output doesn't take a getrandom syscall per block.
+    Without it, a buffer of os.urandom data is drawn once and each block
+    is pieced together from slices of it at scrambled offsets, each XORed
+    with its own scrambled counter (needs numpy);
+    failing that, /dev/urandom or os.urandom is read per block.
+    
+    The keystream is written in place into a ring of `depth` preallocated
+    buffers, so no memory is allocated per block. A returned buffer stays
+    valid until `depth` more blocks have been requested.
+    """
+    if Cipher is None:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None and block_size % 8 == 0:
+            # Not a CSPRNG, but no piece repeats another and none can be
+            # predicted without the master buffer, which is all an overwrite
+            # needs; it runs at memory speed rather than PRNG speed. Blocks
+            # are built from pieces of at most a quarter of the master, so
+            # even a 64MB block is not one slice repeated.
+            master = np.frombuffer(os.urandom(_MASTER_RANDOM_SIZE), dtype=np.uint64)
+            piece = min(block_size, _MASTER_RANDOM_SIZE // 4) // 8
+            offsets = len(master) - piece + 1
+            counter = itertools.count()
+            
+            def fill(buf):
+                out = np.frombuffer(buf, dtype=np.uint64)
+                for start in range(0, len(out), piece):
+                    h = (next(counter) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+                    offset = (h >> 24) % offsets
+                    end = min(start + piece, len(out))
+                    np.bitwise_xor(master[offset:offset + end - start], np.uint64(h),
+                                   out=out[start:end])
+        elif os.path.exists('/dev/urandom'):
+            # Read straight into the ring rather than into a new bytes object
+            # per block
+            urandom = open('/dev/urandom', 'rb', buffering=0)
+            
+            def fill(buf):
+                view = memoryview(buf)
+                while view:
+                    view = view[urandom.readinto(view):]
+        else:
+            return lambda: os.urandom(block_size)
+    else:
+        encryptor = Cipher(algorithms.ChaCha20(os.urandom(32), os.urandom(16)), mode=None).encryptor()
+        # The all-zero input block is shared by every stream of this size
+        fill = functools.partial(encryptor.update_into, pattern_block('zeroes', block_size))
+    
+    # mmap memory is page-aligned, so the ring can also be written with O_DIRECT
+    ring = [mmap.mmap(-1, block_size) for _ in range(depth)]
+    views = [memoryview(buf) for buf in ring]
+    slot = [0]
+    
+    def next_block():
+        i = slot[0]
+        slot[0] = (i + 1) % depth
+        fill(ring[i])
+        return views[i]
+    
+    return next_block
+
+
+# Repeating byte patterns for the deterministic wipe modes
+_PATTERN_BYTES = {'zeroes': b'\x00', 'ones': b'\xFF', 'ticks': b'3===D', 'haha': b'haha-'}
+
+@functools.lru_cache(maxsize=2)
+def pattern_block(mode, block_size):
+    """Build one block of a deterministic wipe pattern (zeroes for unknown modes).
+
+    Blocks are cached read-only views of page-aligned memory, so all the
+    writers of a fill (and O_DIRECT writes) share one buffer. Blocks can be
+    64MB, so only two are kept and wipe_fill empties the cache when done.
+    """
+    pattern_bytes = _PATTERN_BYTES.get(mode, b'\x00')
+    buf = mmap.mmap(-1, block_size)
+    if pattern_bytes != b'\x00':  # anonymous mmap memory starts out zeroed
+        # Write the tiled pattern through a view so the tail isn't trimmed by copying
+        buf.write(memoryview(pattern_bytes * (block_size // len(pattern_bytes) + 1))[:block_size])
+    return memoryview(buf).toreadonly()
+
+
+# Colors the pass headers cycle through
+_PASS_COLORS = (GREEN, YELLOW, CYAN, MAGENTA, BLUE)
+
+def _build_schedule(pattern, passes):
+    """
+    List (mode, color) for each pass. A single pattern is used for every
+    pass; 'all' cycles random, zeroes, ones, starting with random.
+    """
+    if pattern in _PATTERN_BYTES or pattern == 'random':
+        modes = [pattern] * passes
+    else:
+        modes = [{1: 'zeroes', 2: 'ones'}.get(p % 3, 'random') for p in range(passes)]
+    return [(mode, _PASS_COLORS[p % len(_PASS_COLORS)]) for p, mode in enumerate(modes)]
+
+
+# Written data is synced and dropped from the page cache in steps of this size
+_ADVISE_INTERVAL = 64 * 1024 * 1024
+_HAVE_FADVISE = hasattr(os, 'posix_fadvise')
+
+# Chunks allowed in flight between the generating and the writing thread,
+# fewer with large blocks so the queue holds at most _WRITE_QUEUE_BYTES
+_WRITE_QUEUE_DEPTH = 8
+_WRITE_QUEUE_BYTES = 16 * 1024 * 1024
+
+# Most queued chunks the writer hands to a single writev call
+_WRITEV_BATCH = 8
+
+# Threads writing separate regions of a preallocated fill file at once
+_FILL_WORKERS = min(8, os.cpu_count() or 1)
+
+# Rough limit on the random-data buffers one fill keeps: the region
+# workers' blocks, and separately the sequential phase's ring
+_FILL_MEMORY_BYTES = 256 * 1024 * 1024
+
+
+# Filesystems that record preallocated space as unwritten extents, so a
+# reservation costs no data writes. Linux statfs magic numbers: ext2/3/4,
+# xfs, btrfs, ntfs3.
+_UNWRITTEN_EXTENT_MAGIC = {0xEF53, 0x58465342, 0x9123683E, 0x7366746E}
+_UNWRITTEN_EXTENT_NAMES = {'apfs', 'ntfs', 'refs'}
+
+
+def _has_unwritten_extents(fd):
+    """Return True if fd's filesystem preallocates without writing zeroes.
+
+    Elsewhere a reservation is a hidden extra pass: vfat's fallocate
+    zero-writes the whole range inside the call, and HFS+/FAT/exFAT fill
+    the gap when a write lands past the end of file.
+    """
+    try:
+        if _SYSTEM == 'Linux':
+            libc = ctypes.CDLL(None, use_errno=True)
+            buf = ctypes.create_string_buffer(256)  # struct statfs; f_type comes first
+            if libc.fstatfs(fd, buf) != 0:
+                return False
+            return ctypes.c_long.from_buffer(buf).value & 0xFFFFFFFF in _UNWRITTEN_EXTENT_MAGIC
+        elif _SYSTEM == 'Darwin':
+            libc = ctypes.CDLL(None, use_errno=True)
+            # 64-bit-inode struct statfs; f_fstypename is char[16] at offset 72
+            fstatfs = getattr(libc, 'fstatfs64', None) or libc.fstatfs
+            buf = ctypes.create_string_buffer(2168)
+            if fstatfs(fd, buf) != 0:
+                return False
+            return buf.raw[72:88].split(b'\0')[0].decode().lower() in _UNWRITTEN_EXTENT_NAMES
+        elif _SYSTEM == 'Windows':
+            import msvcrt
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            name = ctypes.create_unicode_buffer(64)
+            if not kernel32.GetVolumeInformationByHandleW(
+                    ctypes.c_void_p(msvcrt.get_osfhandle(fd)), None, 0, None, None, None, name, len(name)):
+                return False
+            return name.value.lower() in _UNWRITTEN_EXTENT_NAMES
+    except (AttributeError, OSError, UnicodeDecodeError):
+        pass
+    return False
+
+
+def _preallocate(fd, size):
+    """Reserve size bytes for fd up front so the fill runs into ready extents.
+
+    Best effort: returns False when the platform or filesystem can't do it
+    and the file simply grows as it is written. Only done where
+    _has_unwritten_extents() says the reservation writes nothing.
+    """
+    if not _has_unwritten_extents(fd):
+        return False
+    try:
+        if _SYSTEM == 'Linux':
+            # Call fallocate(2) directly; os.posix_fallocate falls back to
+            # writing a byte into every block on filesystems without support
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+            return libc.fallocate(fd, 0, 0, size) == 0
+        elif _SYSTEM == 'Darwin':
+            import fcntl
+            import struct
+            F_PREALLOCATE = getattr(fcntl, 'F_PREALLOCATE', 42)
+            F_ALLOCATECONTIG, F_ALLOCATEALL, F_PEOFPOSMODE = 0x2, 0x4, 3
+            # fstore_t: flags, posmode, offset, length, bytesalloc
+            try:
+                fcntl.fcntl(fd, F_PREALLOCATE, struct.pack('Iiqqq', F_ALLOCATECONTIG | F_ALLOCATEALL, F_PEOFPOSMODE, 0, size, 0))
+            except OSError:
+                # No contiguous run that large; take whatever extents exist
+                fcntl.fcntl(fd, F_PREALLOCATE, struct.pack('Iiqqq', F_ALLOCATEALL, F_PEOFPOSMODE, 0, size, 0))
+            return True
+        elif _SYSTEM == 'Windows':
+            import msvcrt
+            # FileAllocationInfo reserves clusters without moving the end of
+            # file, so NTFS has nothing to zero-fill ahead of the writes
+            FileAllocationInfo = 5
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            allocation = ctypes.c_longlong(size)
+            return bool(kernel32.SetFileInformationByHandle(
+                ctypes.c_void_p(msvcrt.get_osfhandle(fd)), FileAllocationInfo,
+                ctypes.byref(allocation), ctypes.sizeof(allocation)))
+    except (AttributeError, OSError):
+        pass
+    return False
+
+
+def set_direct_io(fd, enable):
+    """Switch page-cache bypass on or off for fd; returns True if it took effect.
+
+    Linux uses O_DIRECT, which needs page-aligned buffers, offsets and
+    sizes; macOS uses F_NOCACHE, which has no such rules.
+    """
+    try:
+        import fcntl
+        if _SYSTEM == 'Linux' and hasattr(os, 'O_DIRECT'):
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            flags = flags | os.O_DIRECT if enable else flags & ~os.O_DIRECT
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags)
+            return True
+        elif _SYSTEM == 'Darwin':
+            fcntl.fcntl(fd, getattr(fcntl, 'F_NOCACHE', 48), 1 if enable else 0)
+            return True
+    except (ImportError, OSError):
+        pass
+    return False
+
+
+def _queue_writer(f, q, status):
+    """Write chunks from q to f until a None sentinel arrives.
+
+    Chunks already waiting in the queue are written together with one
+    writev call (one write per chunk where writev is missing), at most
+    status['batch'] of them (default _WRITEV_BATCH). The first
+    OSError is stored in status['error']; after that the queue is still
+    drained so the producer never blocks on a full queue. With
+    status['direct'] set, a write that O_DIRECT refuses (unaligned buffer or
+    the sub-block tail of a full disk) turns it off and is retried cached.
+    """
+    fd = f.fileno()
+    direct = status.get('direct', False)
+    next_advise = _ADVISE_INTERVAL
+    writev = getattr(os, 'writev', None)
+    batch = status.get('batch', _WRITEV_BATCH)
+    finished = False
+    while not finished:
+        chunks = [q.get()]
+        while len(chunks) < batch and chunks[-1] is not None:
+            try:
+                chunks.append(q.get_nowait())
+            except queue.Empty:
+                break
+        if chunks[-1] is None:
+            chunks.pop()
+            finished = True
+        if status['error'] is not None or not chunks:
+            continue
+        try:
+            views = [memoryview(chunk) for chunk in chunks]
+            while views:
+                try:
+                    n = writev(fd, views) if writev else os.write(fd, views[0])
+                except OSError as e:
+                    if not direct or e.errno not in (errno.EINVAL, errno.ENOSPC):
+                        raise
+                    set_direct_io(fd, False)
+                    direct = False
+                    continue
+                status['written'] += n
+                
+                # Drop what went out; a short write resumes mid-chunk
+                while views and n >= len(views[0]):
+                    n -= len(views[0])
+                    views.pop(0)
+                if n:
+                    views[0] = views[0][n:]
+            
+            # Every 64 MiB let writeback catch up, then drop the
+            # written pages so the temp file doesn't flood the cache
+            if status['written'] >= next_advise:
+                if _HAVE_FADVISE:
+                    os.fdatasync(fd)
+                    os.posix_fadvise(fd, 0, status['written'], os.POSIX_FADV_DONTNEED)
+                next_advise = status['written'] + _ADVISE_INTERVAL
+        except OSError as e:
+            status['error'] = e
+
+
+def _fill_region(fd, start, end, block_size, chunk_src, state):
+    """
+    pwrite chunk_src() blocks over [start, end) of fd, adding to
+    state['written'] as it goes. Every region stops once state['stop'] is
+    set. The first OSError is kept in state['error']; it sets state['stop']
+    unless it is ENOSPC/EFBIG, which only ends this region so the others
+    still overwrite theirs.
+    """
+    pos = start
+    next_advise = start + _ADVISE_INTERVAL
+    try:
+        while pos < end and not state['stop']:
+            view = memoryview(chunk_src())
+            while view:
+                try:
+                    n = os.pwrite(fd, view, pos)
+                except OSError as e:
+                    # Same O_DIRECT fallback as the queue writer
+                    if not state['direct'] or e.errno not in (errno.EINVAL, errno.ENOSPC):
+                        raise
+                    with state['lock']:
+                        if state['direct']:
+                            set_direct_io(fd, False)
+                            state['direct'] = False
+                    continue
+                pos += n
+                view = view[n:]
+                with state['lock']:
+                    state['written'] += n
+            
+            # Every 64 MiB let writeback catch up and drop this region's pages
+            if pos >= next_advise:
+                if _HAVE_FADVISE:
+                    os.fdatasync(fd)
+                    os.posix_fadvise(fd, start, pos - start, os.POSIX_FADV_DONTNEED)
+                next_advise = pos + _ADVISE_INTERVAL
+    except OSError as e:
+        with state['lock']:
+            if state['error'] is None:
+                state['error'] = e
+            if e.errno not in (errno.ENOSPC, errno.EFBIG):
+                state['stop'] = True
+
+
+def wipe_fill(f, mode, total, block_size, progress_bar, estimated_speed, verify=False):
+    """
+    Fill the open file f with mode's data until the filesystem is full.
+    
+    When the file could be preallocated (to one block short of total),
+    that space is split into block-aligned regions which up to
+    _FILL_WORKERS threads pwrite at the same time, keeping several requests
+    queued at the device. Whatever is left beyond the reservation (or
+    everything, without pwrite/preallocation) is
+    appended sequentially: blocks are generated on this thread and written
+    by a worker thread through a bounded queue. progress_bar gets the
+    written byte count about twice a second. Once done the fill is synced
+    to the device, read back and checked against the pattern if verify is
+    set, and the file truncated, ready to be unlinked.
+    
+    Returns (bytes written, error); error is None when the fill simply ran
+    out of space, otherwise the OSError that stopped it.
+    """
+    # Fresh keystream per writer, seeded once from the OS; fixed patterns
+    # are built once and the same block is written every time
+    if mode == 'random':
+        make_src = lambda depth=1: random_stream(block_size, depth=depth)
+    else:
+        pattern_src = lambda buf=pattern_block(mode, block_size): buf
+        make_src = lambda depth=1: pattern_src
+    
+    fd = f.fileno()
+    
+    # Reserve whole blocks, one short of the free space: filesystems that
+    # keep some space for metadata refuse an allocation of all of it
+    blocks = max(0, total // block_size - 1)
+    preallocated = _preallocate(fd, blocks * block_size)
+    
+    # Keep the fill out of the page cache where the filesystem allows it;
+    # tmpfs and some FUSE filesystems refuse O_DIRECT and stay cached
+    f.flush()
+    direct = set_direct_io(fd, True)
+    
+    written = 0
+    reported = 0
+    error = None
+    
+    # Parallel phase. Only on space reserved as unwritten extents: pwrite
+    # past the end of file elsewhere makes HFS+/FAT/exFAT zero-fill the gap.
+    # Each random worker has a block of its own, so big blocks mean fewer.
+    workers = min(_FILL_WORKERS, blocks)
+    if mode == 'random':
+        workers = min(workers, max(1, _FILL_MEMORY_BYTES // block_size))
+    if preallocated and hasattr(os, 'pwrite') and workers > 1:
+        per_worker = blocks // workers
+        state = {'written': 0, 'error': None, 'stop': False, 'direct': direct,
+                 'lock': threading.Lock()}
+        threads = []
+        for i in range(workers):
+            start = i * per_worker * block_size
+            end = blocks * block_size if i == workers - 1 else start + per_worker * block_size
+            threads.append(threading.Thread(target=_fill_region, daemon=True,
+                                            args=(fd, start, end, block_size, make_src(), state)))
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+                    done = state['written']
+                    progress_bar.update(done - reported)
+                    reported = done
+        finally:
+            state['stop'] = True
+            for t in threads:
+                t.join()
+        written = state['written']
+        direct = state['direct']
+        error = state['error']
+        del threads  # and with them the workers' buffers
+        os.lseek(fd, blocks * block_size, os.SEEK_SET)
+    
+    # Sequential phase. At any time up to depth chunks are queued, up to
+    # batch more are in the writer's writev and one is waiting to be
+    # queued, so a ring of depth + batch + 2 never refills a buffer still
+    # in use. The batch is capped at depth (the queue keeps refilling while
+    # the writer collects, so it is not otherwise bounded by it), and with
+    # big blocks the queue gets shorter so the ring stays near
+    # _FILL_MEMORY_BYTES.
+    if error is None:
+        depth = max(2, min(_WRITE_QUEUE_DEPTH, _WRITE_QUEUE_BYTES // block_size))
+        depth = max(1, min(depth, (_FILL_MEMORY_BYTES // block_size - 2) // 2))
+        batch = min(depth, _WRITEV_BATCH)
+        chunk_src = make_src(depth + batch + 2)
+        
+        # The display is refreshed every blocks_per_tick blocks, aimed at
+        # twice a second from the estimated speed and re-aimed from the
+        # measured one
+        base = written
+        queued = 0
+        block_i = 0
+        blocks_per_tick = max(1, int(estimated_speed * 0.5) // block_size)
+        last_display_time = time.time()
+        
+        q = queue.Queue(maxsize=depth)
+        status = {'written': 0, 'error': None, 'direct': direct, 'batch': batch}
+        writer = threading.Thread(target=_queue_writer, args=(f, q, status), daemon=True)
+        writer.start()
+        try:
+            while status['error'] is None:
+                q.put(chunk_src())
+                queued += block_size
+                
+                block_i += 1
+                if block_i >= blocks_per_tick:
+                    block_i = 0
+                    current_time = time.time()
+                    
+                    # Only count what has left the queue
+                    done = base + queued - q.qsize() * block_size
+                    progress_bar.update(done - reported)
+                    reported = done
+                    
+                    # Scale the block count so the next tick lands ~0.5s out
+                    interval = current_time - last_display_time
+                    if interval > 0:
+                        blocks_per_tick = max(1, int(blocks_per_tick * 0.5 / interval))
+                    last_display_time = current_time
+        finally:
+            # Let the writer drain what is queued, then collect its result
+            q.put(None)
+            writer.join()
+            written = base + status['written']
+            error = status['error']
+        
+        # Running out of space is how the sequential phase ends. In the
+        # parallel phase it would mean part of the reservation went
+        # unwritten, so an error from there is always reported.
+        if error is not None and error.errno in (errno.ENOSPC, errno.EFBIG):
+            error = None
+    
+    if written > reported:
+        progress_bar.update(written - reported)
+    
+    # Push the tail of the fill (everything since the writers' last 64 MiB
+    # sync) to the device, then give the blocks back before the file is
+    # unlinked. Truncating first would let the kernel discard those dirty
+    # pages without ever writing them.
+    try:
+        f.flush()
+        getattr(os, 'fdatasync', os.fsync)(fd)
+    except OSError:
+        pass
+    
+    if verify and error is None:
+        # Drop the cached copy so the read-back comes from the device
+        if _HAVE_FADVISE:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        try:
+            bad = _verify_fill(f.name, mode, written, block_size)
+            if bad is not None:
+                error = OSError(errno.EIO, f"Verification failed at offset {bad}")
+        except OSError as e:
+            error = e
+    
+    try:
+        os.ftruncate(fd, 0)
+    except OSError:
+        pass
+    
+    # Don't keep a pattern block of up to 64MB around between operations
+    pattern_block.cache_clear()
+    
+    return written, error
+
+
+def _verify_fill(path, mode, length, block_size):
+    """
+    Read back the first length bytes of the fill file at path and return the
+    offset of the first block that doesn't hold mode's pattern, or None.
+    Random data can't be predicted, so for it this only checks that every
+    block reads back.
+    """
+    expected = None if mode == 'random' else bytes(pattern_block(mode, block_size))
+    buf = bytearray(block_size)
+    view = memoryview(buf)
+    pos = 0
+    with open(path, 'rb', buffering=0) as r:
+        # One front-to-back pass: ask for the larger readahead window
+        if _HAVE_FADVISE:
+            os.posix_fadvise(r.fileno(), 0, length, os.POSIX_FADV_SEQUENTIAL)
+        while pos < length:
+            # Whole blocks from a regular file, so every block lines up
+            # with the pattern; bytearray == bytes is a plain memcmp
+            n = r.readinto(view[:min(block_size, length - pos)])
+            if not n:
+                return pos
+            if expected is not None:
+                same = buf == expected if n == block_size else view[:n] == expected[:n]
+                if not same:
+                    return pos
+            pos += n
+    return None
+
+
 # convert bytes to human-readable format
+_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 def format_size(num):
     if num is None or num == 0:
         return "Unknown"
-        
-    for unit in ['B','KB','MB','GB','TB']:
-        if num < 1024.0:
-            return f"{num:.2f}{unit}"
-        num /= 1024.0
-    return f"{num:.2f}PB"
+    
+    # Pick the unit directly from the magnitude instead of dividing in a loop
+    i = min(int(math.log(num, 1024)), 5) if num >= 1 else 0
+    return f"{num / 1024 ** i:.2f}{_UNITS[i]}"
 
 
 
@@ -117,7 +696,7 @@ def parse_size(size_str):
         return 0
     
     # Handle "X.XX Y" format (e.g., "500.1 GB")    
-    match = re.match(r'([0-9,.]+)\s*([A-Za-z]+)', size_str)
+    match = _SIZE_RE.match(size_str)
     if not match:
         try:
             return int(size_str)
@@ -147,100 +726,106 @@ def parse_size(size_str):
 
 
 # convret filesystem type to user-friendly name
+_FS_FRIENDLY = {
+    'apfs': 'APFS', 'apple': 'APFS', 'apfs_case_sensitive': 'APFS',
+    'hfs': 'HFS+', 'hfs+': 'HFS+',
+    'fat32': 'FAT32', 'vfat': 'FAT32', 'fat': 'FAT32',
+    'exfat': 'exFAT',
+    'ntfs': 'NTFS',
+    'ext2': 'EXT2', 'ext3': 'EXT3', 'ext4': 'EXT4',
+    'xfs': 'XFS',
+    'btrfs': 'Btrfs',
+    'zfs': 'ZFS',
+    'ufs': 'UFS',
+    'tmpfs': 'tmpfs',
+    'devfs': 'devfs',
+}
+
 def get_friendly_fs_type(fs_type):
     """Get a user-friendly filesystem type name."""
     fs_type = fs_type.lower() if fs_type else ""
-    
-    # Common filesystem types
-    if fs_type in ["apfs", "apple", "apfs_case_sensitive"]:
-        return "APFS"
-    elif fs_type in ["hfs", "hfs+"]:
-        return "HFS+"
-    elif fs_type in ["fat32", "vfat", "fat"]:
-        return "FAT32"
-    elif fs_type in ["exfat"]:
-        return "exFAT"
-    elif fs_type in ["ntfs"]:
-        return "NTFS"
-    elif fs_type in ["ext2", "ext3", "ext4"]:
-        return fs_type.upper()
-    elif fs_type in ["xfs"]:
-        return "XFS"
-    elif fs_type in ["btrfs"]:
-        return "Btrfs"
-    elif fs_type in ["zfs"]:
-        return "ZFS"
-    elif fs_type in ["ufs"]:
-        return "UFS"
-    elif fs_type in ["tmpfs"]:
-        return "tmpfs"
-    elif fs_type in ["devfs"]:
-        return "devfs"
-    else:
-        return fs_type.upper() if fs_type else "Unknown"
+    return _FS_FRIENDLY.get(fs_type, fs_type.upper() if fs_type else "Unknown")
+
 
 
 
 
+def _diskutil_plist(*args):
+    """Run diskutil with -plist and parse the XML as it streams off the pipe."""
+    cmd = ['diskutil', *args]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        # fmt is given explicitly because format sniffing needs a seekable file
+        result = plistlib.load(proc.stdout, fmt=plistlib.FMT_XML)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return result
+
 
 # MacOS-specific disk info retrieval
 def get_macos_disk_info():
     """Get detailed disk information for macOS systems."""
     try:
-        # First get list of physical disks
-        disks_output = subprocess.check_output(['diskutil', 'list'], stderr=subprocess.STDOUT).decode('utf-8')
+        # One plist call lists every whole disk with its size. Not filtered to
+        # 'physical': the APFS container holding / is a synthesized disk.
+        disks_plist = _diskutil_plist('list', '-plist')
         physical_disks = []
+        disk_sizes = {}
         
         # Extract the disk identifiers (disk0, disk1, etc.)
-        for line in disks_output.split('\n'):
-            if line.startswith('/dev/disk'):
-                disk_id = line.split()[0].replace('/dev/', '')
-                if disk_id not in physical_disks and not any(c.isdigit() and c != disk_id[-1] for c in disk_id):
-                    physical_disks.append(disk_id)
+        for disk in disks_plist.get('AllDisksAndPartitions', []):
+            disk_id = disk.get('DeviceIdentifier') or ''
+            # Whole disks only (disk3, not disk3s1); dict lookup for the dedup
+            if _WHOLE_DISK_RE.match(disk_id) and disk_id not in disk_sizes:
+                physical_disks.append(disk_id)
+                disk_sizes[disk_id] = disk.get('Size', 0)
         
         disk_info = {}
         
+        # One partition scan shared by every disk below
+        all_parts = psutil.disk_partitions(all=True)
+        
+        # diskutil info has no batched form, so run the per-disk calls side by side
+        def diskutil_info(disk_id):
+            return _diskutil_plist('info', '-plist', disk_id)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(physical_disks)))) as executor:
+            info_futures = {disk_id: executor.submit(diskutil_info, disk_id) for disk_id in physical_disks}
+        
         # Get detailed info for each physical disk
         for disk_id in physical_disks:
             try:
                 disk_info[disk_id] = {}
-                info = subprocess.check_output(['diskutil', 'info', disk_id], stderr=subprocess.STDOUT).decode('utf-8')
+                info = info_futures[disk_id].result()
                 
                 # Get basic disk info
-                name_match = re.search(r'Device / Media Name:\s+(.+)', info)
-                if name_match:
-                    disk_info[disk_id]['name'] = name_match.group(1).strip()
-                else:
-                    disk_info[disk_id]['name'] = f"Disk {disk_id}"
+                disk_info[disk_id]['name'] = (info.get('MediaName') or '').strip() or f"Disk {disk_id}"
                 
                 # Get disk size directly from volume info
                 size_bytes = 0
                 size_human = "Unknown"
                 
-                for part in psutil.disk_partitions(all=True):
+                for part in all_parts:
                     if disk_id in part.device:
                         try:
                             # Get size from mount point rather than diskutil
-                            usage = psutil.disk_usage(part.mountpoint)
+                            usage = shutil.disk_usage(part.mountpoint)
                             if usage.total > size_bytes:
                                 size_bytes = usage.total
                                 size_human = format_size(usage.total)
                         except:
                             pass
                 
-                # If we couldn't get size from volumes, try diskutil output
-                if size_bytes == 0:
-                    size_match = re.search(r'Disk Size:\s+([0-9,]+)\s+Bytes\s+\(([^)]+)\)', info)
-                    if size_match:
-                        size_bytes = int(size_match.group(1).replace(',', ''))
-                        size_human = size_match.group(2).strip()
+                # If we couldn't get size from volumes, use the size diskutil reported
+                if size_bytes == 0 and disk_sizes.get(disk_id):
+                    size_bytes = disk_sizes[disk_id]
+                    size_human = format_size(size_bytes)
                 
                 disk_info[disk_id]['size'] = size_bytes
                 disk_info[disk_id]['size_human'] = size_human
                 
                 # Now get info about volumes on this disk
                 volumes = []
-                for part in psutil.disk_partitions(all=True):
+                for part in all_parts:
                     if disk_id in part.device:
                         vol_info = {
                             'device': part.device,
@@ -249,7 +834,7 @@ def get_macos_disk_info():
                         }
                         
                         try:
-                            usage = psutil.disk_usage(part.mountpoint)
+                            usage = shutil.disk_usage(part.mountpoint)
                             vol_info['total'] = usage.total
                             vol_info['free'] = usage.free
                         except:
@@ -290,57 +875,51 @@ def get_macos_disk_info():
         return {}
 
 
+# Virtual/system filesystem types to exclude
+_VIRTUAL_FS_TYPES = frozenset({
+    'sysfs', 'proc', 'devtmpfs', 'devpts', 'tmpfs', 'securityfs',
+    'cgroup', 'cgroup2', 'pstore', 'bpf', 'configfs', 'debugfs',
+    'tracefs', 'fusectl', 'binfmt_misc', 'mqueue', 'hugetlbfs',
+    'autofs', 'rpc_pipefs', 'nfsd', 'sunrpc', 'overlay'
+})
+
+# FUSE-based virtual filesystems
+_FUSE_VIRTUAL = (
+    'fuse.gvfsd-fuse', 'fuse.portal', 'fuse.gvfs-fuse-daemon',
+    'fuse.snapfuse', 'fuse.lxcfs', 'fuse.dbus'
+)
+
+# Device names that indicate virtual filesystems
+_VIRTUAL_DEVICES = frozenset({
+    'none', 'udev', 'tmpfs', 'sysfs', 'proc', 'devpts',
+    'securityfs', 'debugfs', 'configfs', 'fusectl', 'binfmt_misc',
+    'gvfsd-fuse', 'portal', 'overlay'
+})
+
+# Mount point prefixes that are typically system/virtual
+# (nested ones like /sys/kernel or /dev/shm are covered by their parent)
+_SYSTEM_MOUNT_PREFIXES = ('/sys', '/proc', '/dev', '/run', '/tmp', '/var/run', '/snap')
+
 def is_virtual_filesystem(fstype, device, mountpoint):
     """Check if a filesystem is virtual/system and should be excluded."""
     fstype_lower = fstype.lower() if fstype else ""
     device_lower = device.lower() if device else ""
     mountpoint_lower = mountpoint.lower() if mountpoint else ""
     
-    # Virtual/system filesystem types to exclude
-    virtual_fs_types = {
-        'sysfs', 'proc', 'devtmpfs', 'devpts', 'tmpfs', 'securityfs',
-        'cgroup', 'cgroup2', 'pstore', 'bpf', 'configfs', 'debugfs',
-        'tracefs', 'fusectl', 'binfmt_misc', 'mqueue', 'hugetlbfs',
-        'autofs', 'rpc_pipefs', 'nfsd', 'sunrpc', 'overlay'
-    }
-    
-    # FUSE-based virtual filesystems
-    fuse_virtual = {
-        'fuse.gvfsd-fuse', 'fuse.portal', 'fuse.gvfs-fuse-daemon',
-        'fuse.snapfuse', 'fuse.lxcfs', 'fuse.dbus'
-    }
-    
     # Check filesystem type
-    if fstype_lower in virtual_fs_types or any(fuse in fstype_lower for fuse in fuse_virtual):
+    if fstype_lower in _VIRTUAL_FS_TYPES or any(fuse in fstype_lower for fuse in _FUSE_VIRTUAL):
         return True
     
-    # Check device names that indicate virtual filesystems
-    virtual_devices = {
-        'none', 'udev', 'tmpfs', 'sysfs', 'proc', 'devpts',
-        'securityfs', 'debugfs', 'configfs', 'fusectl', 'binfmt_misc',
-        'gvfsd-fuse', 'portal', 'overlay'
-    }
-    
-    if device_lower in virtual_devices:
+    if device_lower in _VIRTUAL_DEVICES:
         return True
     
-    # Check mount points that are typically system/virtual
-    system_mounts = {
-        '/sys', '/proc', '/dev', '/run', '/tmp', '/var/run',
-        '/sys/kernel', '/proc/sys', '/dev/pts', '/dev/shm',
-        '/run/user', '/snap'
-    }
-    
-    for sys_mount in system_mounts:
-        if mountpoint_lower.startswith(sys_mount):
-            return True
-    
-    return False
+    # str.startswith takes the whole prefix tuple in one call
+    return mountpoint_lower.startswith(_SYSTEM_MOUNT_PREFIXES)
 
 # Get list of physical drives in physical_drives dictionary
 def get_physical_drives():
     """Get list of unique physical drives."""
-    system = platform.system()
+    system = _SYSTEM
     physical_drives = []
     
     if system == 'Darwin':  # macOS
@@ -365,8 +944,9 @@ def get_physical_drives():
     else:
         # For non-macOS systems, use a more generic approach with psutil
         seen_devices = set()
+        all_parts = psutil.disk_partitions(all=True)
         
-        for part in psutil.disk_partitions(all=True):
+        for part in all_parts:
             try:
                 # Skip virtual/system filesystems
                 if is_virtual_filesystem(part.fstype, part.device, part.mountpoint):
@@ -379,7 +959,7 @@ def get_physical_drives():
                 device_name = part.device
                 if system == 'Linux':
                     # For Linux: /dev/sda1 → sda
-                    base_device = re.sub(r'[0-9]+$', '', device_name)
+                    base_device = _TRAIL_DIGITS.sub('', device_name)
                 elif system == 'Windows':
                     # For Windows, just use the drive letter
                     base_device = device_name[:2] if len(device_name) >= 2 else device_name
@@ -394,7 +974,7 @@ def get_physical_drives():
                 seen_devices.add(base_device)
                 
                 try:
-                    usage = psutil.disk_usage(part.mountpoint)
+                    usage = shutil.disk_usage(part.mountpoint)
                     
                     # Only include drives with meaningful size (> 1MB)
                     if usage.total < 1024 * 1024:
@@ -419,9 +999,11 @@ def get_physical_drives():
     # If no drives were found, try a fallback method
     if not physical_drives:
         try:
-            for part in psutil.disk_partitions(all=True):
+            if system == 'Darwin':
+                all_parts = psutil.disk_partitions(all=True)
+            for part in all_parts:
                 try:
-                    usage = psutil.disk_usage(part.mountpoint)
+                    usage = shutil.disk_usage(part.mountpoint)
                     
                     physical_drives.append({
                         'id': len(physical_drives),
@@ -446,7 +1028,7 @@ def get_physical_drives():
 
 def find_writable_path_for_volume(mount_path):
     """Find a writable path for a volume that may have read-only restrictions."""
-    system = platform.system()
+    system = _SYSTEM
     
     # Special handling for macOS
     if system == 'Darwin':
@@ -478,18 +1060,42 @@ def find_writable_path_for_volume(mount_path):
 
 
 def get_free_space(path):
-    """Get free space in bytes using psutil."""
+    """Get free space in bytes."""
     try:
-        usage = psutil.disk_usage(path)
-        return usage.free
-    except:
-        # Fall back to statvfs
-        try:
+        if hasattr(os, 'statvfs'):
+            # POSIX: one direct syscall, same value disk_usage().free reports
             st = os.statvfs(path)
             return st.f_bavail * st.f_frsize
-        except:
-            return 0
+        # Windows: GetDiskFreeSpaceExW via shutil
+        return shutil.disk_usage(path).free
+    except:
+        return 0
+
+
+def _box_width(preferred):
+    """Inner width for a box: preferred, narrowed to fit a small terminal."""
+    return max(20, min(preferred, shutil.get_terminal_size().columns - 3))
 
+@functools.lru_cache(maxsize=32)
+def _box_edge(width, border, left, right, fill='═'):
+    """A box's top, divider or bottom line for a box of the given inner width.
+
+    Cached: every box draws the same few edges, dividers often twice.
+    """
+    return f"{border}{left}{fill * (width + 1)}{right}{RESET}"
+
+def _box_title(width, border, title):
+    """A box line holding a title in the border color."""
+    return f"{border}║ {title:<{width}}║{RESET}"
+
+def _box_row(width, border, *parts):
+    """
+    A box line built from (color, text) parts. Padding is counted from the
+    visible text only, so colored parts don't push the right border out.
+    """
+    body = ''.join(f"{color}{text}{RESET}" if color else text for color, text in parts)
+    visible = sum(len(text) for _, text in parts)
+    return f"{border}║{RESET} {body}{' ' * (width - visible)}{border}║{RESET}"
 
 def interactive_drive_selection():
     """Display interactive menu to select drive."""
@@ -500,9 +1106,15 @@ def interactive_drive_selection():
         print(f"{RED}{BRIGHT}Error: No accessible drives found.{RESET}")
         sys.exit(1)
     
-    print(f"{CYAN}{BRIGHT}╔════════════════════════════════════════════════════════════════╗{RESET}")
-    print(f"{CYAN}{BRIGHT}║                  SELECT PHYSICAL DRIVE TO WIPE                 ║{RESET}")
-    print(f"{CYAN}{BRIGHT}╠════════════════════════════════════════════════════════════════╣{RESET}")
+    box_width = _box_width(63)
+    border = CYAN + BRIGHT
+    
+    # Build the whole menu first and write it in one go
+    lines = [
+        _box_edge(box_width, border, '╔', '╗'),
+        _box_title(box_width, border, f"{'SELECT PHYSICAL DRIVE TO WIPE':^{box_width}}"),
+        _box_edge(box_width, border, '╠', '╣'),
+    ]
     
     for drive in drives:
         # Make sure we have valid values
@@ -510,25 +1122,19 @@ def interactive_drive_selection():
         free_display = format_size(drive.get('free', 0))
         fs_display = drive.get('fstype', 'Unknown')
         
-        # Set consistent box width (matches other boxes in the code)
-        box_width = 64  # Reduced by 1 for perfect alignment
-        
-        # Print drive information with consistent box formatting
-        drive_id_str = str(drive['id'])
-        drive_name = drive['name']
-        drive_device = drive['device']
-        drive_mount = drive['mountpoint']
-        
-        # Print each line with proper padding, accounting for color codes
-        print(f"{CYAN}{BRIGHT}║{RESET} [{drive_id_str}] {drive_name}{' ' * (box_width - 4 - len(drive_id_str) - len(drive_name))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}║{RESET}     Device: {GREEN}{drive_device}{RESET}{' ' * (box_width - 13 - len(drive_device))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}║{RESET}     Mount: {GREEN}{drive_mount}{RESET}{' ' * (box_width - 12 - len(drive_mount))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}║{RESET}     Type: {GREEN}{fs_display}{RESET}{' ' * (box_width - 11 - len(fs_display))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}║{RESET}     Size: {GREEN}{size_display}{RESET}{' ' * (box_width - 11 - len(size_display))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}║{RESET}     Free: {GREEN}{free_display}{RESET}{' ' * (box_width - 11 - len(free_display))}{CYAN}{BRIGHT}║{RESET}")
-        print(f"{CYAN}{BRIGHT}╟────────────────────────────────────────────────────────────────╢{RESET}")
-    
-    print(f"{CYAN}{BRIGHT}╚════════════════════════════════════════════════════════════════╝{RESET}")
+        lines += [
+            _box_row(box_width, border, ('', f"[{drive['id']}] {drive['name']}")),
+            _box_row(box_width, border, ('', "    Device: "), (GREEN, drive['device'])),
+            _box_row(box_width, border, ('', "    Mount: "), (GREEN, drive['mountpoint'])),
+            _box_row(box_width, border, ('', "    Type: "), (GREEN, fs_display)),
+            _box_row(box_width, border, ('', "    Size: "), (GREEN, size_display)),
+            _box_row(box_width, border, ('', "    Free: "), (GREEN, free_display)),
+            _box_edge(box_width, border, '╟', '╢', fill='─'),
+        ]
+    
+    lines.append(_box_edge(box_width, border, '╚', '╝'))
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
     
     while True:
         try:
@@ -567,6 +1173,13 @@ def interactive_drive_selection():
 
 def is_path_writable(path):
     """Check if the path is writable."""
+    # access() is enough for ordinary users. Root passes every permission check
+    # and macOS sandboxing/ACLs can say yes while refusing writes, so those
+    # cases still get the real probe.
+    is_root = hasattr(os, 'geteuid') and os.geteuid() == 0
+    if _SYSTEM != 'Darwin' and not is_root and os.path.isdir(path) and os.access(path, os.W_OK):
+        return True
+    
     if not os.path.exists(path):
         try:
             os.makedirs(path, exist_ok=True)
@@ -599,7 +1212,7 @@ def find_writable_path(suggested_path):
             pass
     
     # Try common writable locations
-    system = platform.system()
+    system = _SYSTEM
     
     if system == 'Darwin':  # macOS
         # Try Data volume first
@@ -706,12 +1319,71 @@ def format_time_human_readable(seconds, abbreviated=False):
     return " ".join(parts)
 
 
-def estimate_write_speed():
+# Measured write speeds per device, reused by later runs for a week
+_SPEED_CACHE = os.path.expanduser(os.path.join('~', '.securewipe', 'speed.json'))
+_SPEED_CACHE_MAX_AGE = 7 * 24 * 3600
+
+
+def _speed_key(path):
+    """Cache key for the device holding path, or None if it can't be stat'ed."""
+    try:
+        return str(os.stat(path).st_dev)
+    except (OSError, TypeError):
+        return None
+
+
+def _load_speeds():
+    try:
+        with open(_SPEED_CACHE) as f:
+            speeds = json.load(f)
+        return speeds if isinstance(speeds, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def remember_write_speed(path, bps):
+    """Cache bps as the measured write speed of the device holding path."""
+    key = _speed_key(path)
+    if not key or not bps:
+        return
+    speeds = _load_speeds()
+    speeds[key] = {'bps': bps, 'time': time.time()}
+    cache_dir = os.path.dirname(_SPEED_CACHE)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(_SPEED_CACHE, 'w') as f:
+            json.dump(speeds, f)
+        # Run through sudo, hand the files back to the invoking user
+        # instead of leaving a root-owned ~/.securewipe behind
+        if os.environ.get('SUDO_UID') and hasattr(os, 'chown'):
+            uid, gid = int(os.environ['SUDO_UID']), int(os.environ.get('SUDO_GID', -1))
+            os.chown(cache_dir, uid, gid)
+            os.chown(_SPEED_CACHE, uid, gid)
+    except (OSError, ValueError):
+        pass
+
+
+def estimate_write_speed(path=None, measure=True):
     """
-    Estimate the write speed for the current system.
-    Returns estimated bytes per second based on storage type heuristics.
+    Estimate the write speed of the device holding path, in bytes per second.
+    
+    A measurement younger than _SPEED_CACHE_MAX_AGE is taken from
+    ~/.securewipe/speed.json. Otherwise, with measure set, a 64MB write into
+    path is timed and cached. Without a path, with measure off (callers on
+    the GUI thread) or if that fails, a storage type heuristic is returned.
     """
-    system = platform.system()
+    key = _speed_key(path) if path else None
+    if key:
+        entry = _load_speeds().get(key)
+        if isinstance(entry, dict) and time.time() - entry.get('time', 0) < _SPEED_CACHE_MAX_AGE:
+            return entry['bps']
+        if measure and is_path_writable(path):
+            measured = benchmark_write_speed(path, test_size=64*1024*1024)
+            if measured:
+                remember_write_speed(path, measured)
+                return measured
+    
+    system = _SYSTEM
     
     # Base estimates in MB/s for different storage types
     # These are conservative estimates to avoid under-estimating time
@@ -728,47 +1400,55 @@ def estimate_write_speed():
         # Unknown system, be very conservative
         return 50 * 1024 * 1024   # 50 MB/s
 
-# def benchmark_write_speed(path, test_size=50*1024*1024):  # 50MB test
-#     """
-#     Perform a quick write speed benchmark to get more accurate estimates.
-#     Returns bytes per second, or None if benchmark fails.
-#     """
-#     try:
-#         test_file = os.path.join(path, '.Securewipe_Complete_disk.tmp')
-        
-#         # Generate test data
-#         test_data = os.urandom(min(test_size, 10*1024*1024))  # Max 10MB chunks
-#         chunks_needed = test_size // len(test_data)
-        
-#         start_time = time.time()
-        
-#         with open(test_file, 'wb') as f:
-#             for _ in range(chunks_needed):
-#                 f.write(test_data)
-#                 f.flush()
-        
-#         # Force sync to ensure data is written to disk
-#         try:
-#             os.fsync(f.fileno())
-#         except:
-#             pass
-        
-#         end_time = time.time()
-        
-#         # Clean up test file
-#         try:
-#             os.remove(test_file)
-#         except:
-#             pass
+def benchmark_write_speed(path, test_size=50*1024*1024):  # 50MB test
+    """
+    Perform a quick write speed benchmark to get more accurate estimates.
+    Returns bytes per second, or None if benchmark fails.
+    """
+    test_file = os.path.join(path, '.Securewipe_benchmark.tmp')
+    chunk_size = 4 * 1024 * 1024
+    
+    # One reusable random chunk; mmap memory is page-aligned, which O_DIRECT needs
+    buf = mmap.mmap(-1, chunk_size)
+    buf.write(os.urandom(chunk_size))
+    
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    direct = getattr(os, 'O_DIRECT', 0)
+    
+    def run(open_flags):
+        fd = os.open(test_file, open_flags, 0o600)
+        try:
+            start_time = time.time()
+            written = 0
+            while written < test_size:
+                written += os.write(fd, buf)
+            # Single sync at the end instead of a flush per chunk
+            os.fsync(fd)
+            return written, time.time() - start_time
+        finally:
+            os.close(fd)
+    
+    try:
+        result = None
+        if direct:
+            # Bypass the page cache where the filesystem allows it
+            try:
+                result = run(flags | direct)
+            except OSError:
+                result = None
+        if result is None:
+            result = run(flags)
         
-#         elapsed = end_time - start_time
-#         if elapsed > 0:
-#             return test_size / elapsed
-#         else:
-#             return None
-            
-#     except Exception:
-#         return None
+        written, elapsed = result
+        return written / elapsed if elapsed > 0 else None
+    except Exception:
+        return None
+    finally:
+        buf.close()
+        try:
+            os.remove(test_file)
+        except OSError:
+            pass
 
 def estimate_operation_time(data_size, passes=1, include_benchmark=True, path=None):
     """
@@ -783,8 +1463,9 @@ def estimate_operation_time(data_size, passes=1, include_benchmark=True, path=No
     Returns:
         Dictionary with estimated times and details
     """
-    # Start with system-based estimate
-    estimated_speed = estimate_write_speed()
+    # Start with the cached measurement for path's device, or the
+    # system-based estimate; this never benchmarks by itself
+    estimated_speed = estimate_write_speed(path, measure=False)
     
     # Try to get a more accurate speed through benchmarking
     if include_benchmark and path and is_path_writable(path):
@@ -792,6 +1473,7 @@ def estimate_operation_time(data_size, passes=1, include_benchmark=True, path=No
         try:
             benchmark_speed = benchmark_write_speed(path)
             if benchmark_speed:
+                remember_write_speed(path, benchmark_speed)
                 # Use the benchmark speed but apply a safety factor
                 estimated_speed = benchmark_speed * 0.8  # 20% safety margin
                 print(f"{GREEN}Benchmark complete: {format_size(int(benchmark_speed))}/s{RESET}")
@@ -830,62 +1512,26 @@ def get_confirmation(message, box_style=False):
     """Get user confirmation before proceeding."""
     if box_style:
         # Box width (excluding borders)
-        box_width = 65
+        box_width = _box_width(65)
+        border = YELLOW + BRIGHT
         
-        # Break message into multiple lines if it's too long
+        # Break message into multiple lines if it's too long (-6 for padding);
+        # paths are kept whole rather than split mid-name
         message_lines = []
-        current_line = ""
-        
-        # Check if the message already contains newlines
-        if "\n" in message:
-            # Split by newlines first
-            for line in message.split("\n"):
-                words = line.split()
-                line_current = ""
-                
-                for word in words:
-                    if len(line_current) + len(word) + 1 <= box_width - 6:  # -6 for padding (extra 2 spaces)
-                        if line_current:
-                            line_current += " " + word
-                        else:
-                            line_current = word
-                    else:
-                        message_lines.append(line_current)
-                        line_current = word
-                
-                if line_current:
-                    message_lines.append(line_current)
-        else:
-            # Process as a single line
-            words = message.split()
-            for word in words:
-                if len(current_line) + len(word) + 1 <= box_width - 6:  # -6 for padding (extra 2 spaces)
-                    if current_line:
-                        current_line += " " + word
-                    else:
-                        current_line = word
-                else:
-                    message_lines.append(current_line)
-                    current_line = word
-            
-            if current_line:
-                message_lines.append(current_line)
-        
-        # If no lines were created (e.g., empty message), add an empty line
-        if not message_lines:
-            message_lines = [""]
+        for line in message.split("\n"):
+            message_lines.extend(textwrap.wrap(line, width=box_width - 6,
+                                               break_long_words=False,
+                                               break_on_hyphens=False) or [""])
         
         # Print the confirmation box
-        print(f"{YELLOW}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-        print(f"{YELLOW}{BRIGHT}║ CONFIRMATION REQUIRED{' ' * (box_width - 21)}║{RESET}")
-        print(f"{YELLOW}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-        
-        for line in message_lines:
-            # Add +2 to the padding for better alignment
-            padding = box_width - len(line) - 2 + 2  # -2 for initial space and border, +2 for extra padding
-            print(f"{YELLOW}{BRIGHT}║{RESET} {line}{' ' * padding}{YELLOW}{BRIGHT}║{RESET}")
-        
-        print(f"{YELLOW}{BRIGHT}╚═{'═' * box_width}╝{RESET}")
+        rows = [
+            _box_edge(box_width, border, '╔', '╗'),
+            _box_title(box_width, border, 'CONFIRMATION REQUIRED'),
+            _box_edge(box_width, border, '╠', '╣'),
+        ]
+        rows += [_box_row(box_width, border, ('', line)) for line in message_lines]
+        rows.append(_box_edge(box_width, border, '╚', '╝'))
+        sys.stdout.write('\n'.join(rows) + '\n')
         print(f"{YELLOW}Please confirm (y/n, default=n): {RESET}", end="")
     else:
         print(f"{YELLOW}{BRIGHT}{message} (y/n, default=n): {RESET}", end="")
@@ -899,6 +1545,50 @@ def get_confirmation(message, box_style=False):
 
 
 
+def windows_disk_number(path):
+    """Return the physical disk number N of the disk holding path, or None."""
+    kernel32 = ctypes.windll.kernel32
+    mount = ctypes.create_unicode_buffer(261)
+    volume = ctypes.create_unicode_buffer(50)
+    
+    # Mount point (drive letter or mounted folder) -> \\?\Volume{GUID}\
+    if not kernel32.GetVolumePathNameW(path, mount, len(mount)):
+        return None
+    if not kernel32.GetVolumeNameForVolumeMountPointW(mount.value, volume, len(volume)):
+        return None
+    
+    kernel32.CreateFileW.restype = ctypes.c_void_p
+    handle = kernel32.CreateFileW(volume.value.rstrip('\\'), 0, 0x3, None, 3, 0, None)  # share r/w, OPEN_EXISTING
+    if handle is None or handle == ctypes.c_void_p(-1).value:
+        return None
+    try:
+        # STORAGE_DEVICE_NUMBER: DeviceType, DeviceNumber, PartitionNumber
+        number = (ctypes.c_ulong * 3)()
+        returned = ctypes.c_ulong()
+        IOCTL_STORAGE_GET_DEVICE_NUMBER = 0x2D1080
+        if not kernel32.DeviceIoControl(ctypes.c_void_p(handle), IOCTL_STORAGE_GET_DEVICE_NUMBER, None, 0,
+                                        ctypes.byref(number), ctypes.sizeof(number), ctypes.byref(returned), None):
+            return None
+        return number[1]
+    finally:
+        kernel32.CloseHandle(ctypes.c_void_p(handle))
+
+def _windows_physical_drive(path):
+    """Return the \\\\.\\PhysicalDriveN path of the disk holding path, or None."""
+    number = windows_disk_number(path)
+    return None if number is None else f"\\\\.\\PhysicalDrive{number}"
+
+
+@contextlib.contextmanager
+def _sigint(handler):
+    """Install handler for SIGINT, restoring the previous one on exit."""
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
 def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, pattern='all', no_confirm=False):    
     # Initialize free_space to 0
     free_space = 0
@@ -917,39 +1607,28 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
     
     # Ask if the user wants to format the entire device instead
     device_path = None
-    if platform.system() == 'Darwin':  # macOS
+    if _SYSTEM == 'Darwin':  # macOS
         # Try to extract disk identifier from the mount point
         try:
-            disk_info = subprocess.check_output(['df', '-h', root], stderr=subprocess.STDOUT).decode('utf-8')
+            disk_info = subprocess.check_output(['df', '-h', root], stderr=subprocess.STDOUT, encoding='utf-8')
             lines = disk_info.strip().split('\n')
             if len(lines) > 1:
                 device_path = lines[1].split()[0]  # Get the device path from df output
         except:
             pass
-    elif platform.system() == 'Linux':
+    elif _SYSTEM == 'Linux':
         # Try to get the device from mount point
         try:
-            disk_info = subprocess.check_output(['df', '-h', root], stderr=subprocess.STDOUT).decode('utf-8')
+            disk_info = subprocess.check_output(['df', '-h', root], stderr=subprocess.STDOUT, encoding='utf-8')
             lines = disk_info.strip().split('\n')
             if len(lines) > 1:
                 device_path = lines[1].split()[0]  # Get the device path from df output
         except:
             pass
-    elif platform.system() == 'Windows':
-        # Try to get the device from mount point
+    elif _SYSTEM == 'Windows':
+        # Ask the volume driver which physical disk it lives on
         try:
-            # Get volume information for the selected path
-            ps_cmd = f'Get-WmiObject -Query "SELECT * FROM Win32_Volume WHERE DriveLetter = \'{root[:2]}\'"'
-            vol_info = subprocess.check_output(['powershell', '-Command', ps_cmd], stderr=subprocess.STDOUT).decode('utf-8')
-            
-            # Extract the device ID (e.g., \\.\PHYSICALDRIVE1)
-            device_match = re.search(r'DeviceID\s*:\s*(.+)', vol_info)
-            if device_match:
-                device_id = device_match.group(1).strip()
-                # Extract the number from the device ID
-                disk_num_match = re.search(r'PHYSICALDRIVE(\d+)', device_id)
-                if disk_num_match:
-                    device_path = f"\\\\.\\PhysicalDrive{disk_num_match.group(1)}"
+            device_path = _windows_physical_drive(root)
         except:
             pass
     
@@ -964,9 +1643,9 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
             fs_options = ['exfat', 'fat32', 'ntfs']
             
             # Add platform-specific filesystem options
-            if platform.system() == 'Darwin':
+            if _SYSTEM == 'Darwin':
                 fs_options.extend(['apfs', 'hfs+'])
-            elif platform.system() == 'Linux':
+            elif _SYSTEM == 'Linux':
                 fs_options.extend(['ext4', 'ext3', 'ext2'])
             
             for i, fs in enumerate(fs_options):
@@ -1002,14 +1681,14 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
     fname = os.path.join(root, '.Securewipe_free_space.tmp')
     
     # Set up signal handlers and cleanup functions for the temp file
-    temp_files = [fname]
+    temp_files = {fname}
     
     # Create a container for the progress bar reference so it can be modified in closures
     progress_bar_container = {'instance': None}
     
     def cleanup_temp_files():
         """Clean up any temporary files created during the wiping process."""
-        for temp_file in temp_files:
+        for temp_file in list(temp_files):
             try:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
@@ -1031,28 +1710,28 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
         print(f"{RED}Wiping operation canceled.{RESET}")
         sys.exit(130)  # 130 is the standard exit code for SIGINT
     
-    # Register cleanup functions
-    atexit.register(cleanup_temp_files)
-    signal.signal(signal.SIGINT, signal_handler)
-    
     # Get time estimate before showing status
     time_estimate = estimate_operation_time(free_space, passes, include_benchmark=True, path=root)
     
     # Enhanced status display
-    box_width = 65
-    print(f"{CYAN}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-    print(f"{CYAN}{BRIGHT}║ SECURE FREE SPACE WIPING{' ' * (box_width - 24)}║{RESET}")
-    print(f"{CYAN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-    # Standardize padding calculations by adding consistent offsets
-    print(f"{CYAN}{BRIGHT}║{RESET} Target: {GREEN}{root}{' ' * (box_width - 9 - len(root) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Free space: {GREEN}{free_space_display}{' ' * (box_width - 13 - len(free_space_display) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Passes: {GREEN}{passes}{' ' * (box_width - 9 - len(str(passes)) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Block size: {GREEN}{format_size(block_size)}{' ' * (box_width - 13 - len(format_size(block_size)) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Pattern: {GREEN}{pattern}{' ' * (box_width - 10 - len(pattern) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Estimated time: {YELLOW}{time_estimate['estimated_human']}{' ' * (box_width - 17 - len(time_estimate['estimated_human']) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}║{RESET} Completion: {YELLOW}{time_estimate['completion_time']}{' ' * (box_width - 13 - len(time_estimate['completion_time']) + 1)}{CYAN}{BRIGHT}║{RESET}")
-    print(f"{CYAN}{BRIGHT}╚═{'═' * box_width}╝{RESET}\n")
+    block_size_str = format_size(block_size)
+    box_width = _box_width(65)
+    border = CYAN + BRIGHT
+    rows = [
+        _box_edge(box_width, border, '╔', '╗'),
+        _box_title(box_width, border, 'SECURE FREE SPACE WIPING'),
+        _box_edge(box_width, border, '╠', '╣'),
+        _box_row(box_width, border, ('', "Target: "), (GREEN, root)),
+        _box_row(box_width, border, ('', "Free space: "), (GREEN, free_space_display)),
+        _box_row(box_width, border, ('', "Passes: "), (GREEN, str(passes))),
+        _box_row(box_width, border, ('', "Block size: "), (GREEN, block_size_str)),
+        _box_row(box_width, border, ('', "Pattern: "), (GREEN, pattern)),
+        _box_edge(box_width, border, '╠', '╣'),
+        _box_row(box_width, border, ('', "Estimated time: "), (YELLOW, time_estimate['estimated_human'])),
+        _box_row(box_width, border, ('', "Completion: "), (YELLOW, time_estimate['completion_time'])),
+        _box_edge(box_width, border, '╚', '╝'),
+    ]
+    sys.stdout.write('\n'.join(rows) + '\n\n')
     
     # Get confirmation before starting
     if not no_confirm:
@@ -1064,25 +1743,14 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
     # Start time for overall ETA calculation
     overall_start_time = time.time()
     
+    # Temp files are removed and the previous SIGINT handler restored
+    # however the passes end
+    cleanup = contextlib.ExitStack()
+    cleanup.callback(cleanup_temp_files)
+    cleanup.enter_context(_sigint(signal_handler))
+    
     try:
-        for p in range(passes):
-            if pattern == 'zeroes':
-                mode = 'zeroes'
-            elif pattern == 'ones':
-                mode = 'ones'
-            elif pattern == 'random':
-                mode = 'random'
-            elif pattern == 'ticks':
-                mode = 'ticks'
-            elif pattern == 'haha':
-                mode = 'haha'
-            else:  # 'all' - default with first pass being random
-                if p == 0:
-                    mode = 'random'
-                else:
-                    mode = {1: 'zeroes', 2: 'ones'}.get(p % 3, 'random')
-            
-            pass_color = [GREEN, YELLOW, CYAN, MAGENTA, BLUE][p % 5]
+        for p, (mode, pass_color) in enumerate(_build_schedule(pattern, passes)):
             print(f"{pass_color}Pass {p+1}/{passes}: filling free space with {mode}{RESET}")
 
             # Calculate and display overall ETA if we've already completed at least one pass
@@ -1093,121 +1761,47 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
                 overall_eta_seconds = avg_time_per_pass * remaining_passes
                 
                 # Format the overall ETA in a readable format (non-abbreviated)
-                overall_eta = format_time_human_readable(overall_eta_seconds, abbreviated=False)
+                overall_eta = format_time_human_readable(int(overall_eta_seconds), abbreviated=False)
                 overall_eta_time = time.strftime("%I:%M %p", time.localtime(time.time() + overall_eta_seconds))
                 print(f"{YELLOW}Overall ETA: {overall_eta} (complete at approximately {overall_eta_time}){RESET}")
                     
-            # Initialize variables for custom progress tracking
-            pass_start_time = time.time()
-            written = 0
-            last_display_time = 0
-            time_line = ""
-            
-            # First print the time line that we'll update in place
-            time_line = "Elapsed: 00:00:00 • Remaining: calculating..."
-            print(time_line)
-            
-            # Create a clean progress bar without time information in the description
-            progress_format = '{percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt}'
+            # tqdm tracks elapsed/remaining itself, so the bar is the only line we draw
+            progress_format = '{percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]'
             progress_bar = tqdm(total=free_space, unit='B', unit_scale=True, 
                              unit_divisor=1024,
                              bar_format=progress_format,
+                             mininterval=_BAR_INTERVAL,
                              leave=True)
             
             # Make the progress bar accessible to the signal handler
             progress_bar_container['instance'] = progress_bar
             
+            written = 0
+            error = None
             try:
                 with open(fname, 'wb') as f:
-                    while True:
-                        if mode == 'random':
-                            chunk = os.urandom(block_size)
-                        elif mode == 'ones':
-                            chunk = b'\xFF' * block_size
-                        elif mode == 'ticks':
-                            # Create a pattern of "3===D" repeated
-                            pattern_bytes = b'3===D'
-                            chunk = (pattern_bytes * (block_size // len(pattern_bytes) + 1))[:block_size]
-                        elif mode == 'haha':
-                            # Create a pattern of "haha-" repeated
-                            pattern_bytes = b'haha-'
-                            chunk = (pattern_bytes * (block_size // len(pattern_bytes) + 1))[:block_size]
-                        else:  # zeroes
-                            chunk = b'\x00' * block_size
-                        
-                        f.write(chunk)
-                        written += block_size
-                                
-                        # Update display periodically
-                        current_time = time.time()
-                        if current_time - last_display_time >= 0.5:  # Update twice per second
-                            # Calculate elapsed and remaining time
-                            elapsed_seconds = current_time - pass_start_time
-                            
-                            # Format elapsed time in a more human-readable format (abbreviated)
-                            elapsed_str = format_time_human_readable(elapsed_seconds, abbreviated=True)
-                            
-                            # Calculate remaining time based on current speed
-                            if written > 0:
-                                bytes_per_second = written / elapsed_seconds
-                                remaining_seconds = (free_space - written) / bytes_per_second if bytes_per_second > 0 else 0
-                                # Use abbreviated format for remaining time too
-                                remaining_str = format_time_human_readable(remaining_seconds, abbreviated=True)
-                            else:
-                                remaining_str = "calculating..."
-                            
-                            # Create new time line
-                            new_time_line = f"Elapsed: {elapsed_str} • Remaining: {remaining_str}"
-                            
-                            # Only update if the line has changed
-                            if new_time_line != time_line:
-                                # Move cursor up one line and clear it
-                                sys.stdout.write("\033[F\033[K")
-                                sys.stdout.write(new_time_line + "\n")
-                                sys.stdout.flush()
-                                time_line = new_time_line
-                            
-                            last_display_time = current_time
-                        
-                        # Update the progress
-                        progress_bar.update(block_size)
-                        
-                        # Occasional flush
-                        if written % (block_size * 100) == 0:
-                            f.flush()
-                            
+                    written, error = wipe_fill(f, mode, free_space, block_size, progress_bar,
+                                                time_estimate['estimated_speed'], verify=verify)
+                if error is not None:
+                    print(f"\n{YELLOW}Error: {error}{RESET}", file=sys.stderr)
             except OSError as e:
-                if e.errno not in (errno.ENOSPC, errno.EFBIG):
-                    print(f"\n{YELLOW}Error: {e}{RESET}", file=sys.stderr)
-                # Break out of the loop if disk is full or another error occurred
-                pass
+                error = e
+                print(f"\n{YELLOW}Error: {e}{RESET}", file=sys.stderr)
             finally:
-                # Close the progress bar
                 progress_bar.close()
                     
-                # Force sync and flush before removing
-                try:
-                    if 'f' in locals() and hasattr(f, 'fileno'):
-                        os.fsync(f.fileno())
-                except Exception:
-                    pass
-                    
                 try:
                     if os.path.exists(fname):
-                        os.remove(fname)
-                        if fname in temp_files:  # Add check to prevent ValueError
-                            temp_files.remove(fname)  # Remove from the cleanup list since we handled it
+                        os.unlink(fname)
+                        temp_files.discard(fname)  # Remove from the cleanup list since we handled it
                 except OSError:
                     pass
                     
             wiped = format_size(min(written, free_space))
             print(f"{GREEN}✓ Pass {p+1} complete, wiped ~{wiped}{RESET}")
             
-            # Verification pass if enabled
-            if verify:
-                print(f"{BLUE}Verifying wiped space...{RESET}")
-                # In a real implementation, this would read back written data
-                # and verify it matches the expected pattern
+            # wipe_fill read the pass back before removing it
+            if verify and error is None:
                 print(f"{GREEN}✓ Verification complete{RESET}")
                 
             print("")  # Empty line between passes
@@ -1217,45 +1811,61 @@ def wipe_free_space(root='/', passes=3, block_size=1048576, verify=False, patter
         time_str = format_time_human_readable(total_time, abbreviated=False)
 
         # Summary with consistent box width
-        box_width = 65
-        print(f"{GREEN}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-        print(f"{GREEN}{BRIGHT}║ WIPING COMPLETE{' ' * (box_width - 15)}║{RESET}")
-        print(f"{GREEN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} Total passes: {GREEN}{passes}{' ' * (box_width - 15 - len(str(passes)) + 1)}{GREEN}{BRIGHT}║{RESET}")
-        
+        box_width = _box_width(65)
+        border = GREEN + BRIGHT
         total_wiped = format_size(min(written*passes, free_space))
-        print(f"{GREEN}{BRIGHT}║{RESET} Total wiped: {GREEN}{total_wiped}{' ' * (box_width - 14 - len(total_wiped) + 1)}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} Time taken: {GREEN}{time_str}{' ' * (box_width - 13 - len(time_str) + 1)}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}╚═{'═' * box_width}╝{RESET}")
-    
+        rows = [
+            _box_edge(box_width, border, '╔', '╗'),
+            _box_title(box_width, border, 'WIPING COMPLETE'),
+            _box_edge(box_width, border, '╠', '╣'),
+            _box_row(box_width, border, ('', "Total passes: "), (GREEN, str(passes))),
+            _box_row(box_width, border, ('', "Total wiped: "), (GREEN, total_wiped)),
+            _box_row(box_width, border, ('', "Time taken: "), (GREEN, time_str)),
+            _box_edge(box_width, border, '╚', '╝'),
+        ]
+        sys.stdout.write('\n'.join(rows) + '\n')
+        
     finally:
         # Ensure cleanup runs even if an exception occurs
-        # Unregister the atexit handler since we'll clean up here
-        atexit.unregister(cleanup_temp_files)
-        cleanup_temp_files()
+        cleanup.close()
 
 
 
 
+# Longest a preflight probe tool may run before it is killed, so one hung
+# tool (a stuck drive, a slow PowerShell) can't stall format_disk
+_PROBE_TIMEOUT = 30
+
+@functools.lru_cache(maxsize=None)
+def _have(cmd):
+    """Return True if cmd is on PATH (looked up once per command)."""
+    return shutil.which(cmd) is not None
+
+@functools.lru_cache(maxsize=64)
+def _exists(path):
+    """os.path.exists, remembered until _exists.cache_clear() (device paths and mounts)."""
+    return os.path.exists(path)
+
+
 def check_hpa_dco(disk_path):
     """Check for HPA/DCO on a disk and attempt to remove them."""
-    system = platform.system()
+    system = _SYSTEM
     has_hidden_areas = False
     messages = []
 
     try:
         if system == 'Linux':
             # Check for hdparm
-            if subprocess.run(['which', 'hdparm'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('hdparm'):
                 # Get device info and original size
-                result = subprocess.run(['hdparm', '-N', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                result = subprocess.run(['hdparm', '-N', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=_PROBE_TIMEOUT)
                 if result.returncode == 0:
                     if "HPA" in result.stdout:
                         has_hidden_areas = True
                         messages.append(f"{YELLOW}HPA detected on {disk_path}{RESET}")
                         
                 # Check for DCO
-                result = subprocess.run(['hdparm', '-I', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                result = subprocess.run(['hdparm', '-I', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=_PROBE_TIMEOUT)
                 if result.returncode == 0:
                     if "DCO is" in result.stdout and "not" not in result.stdout:
                         has_hidden_areas = True
@@ -1263,7 +1873,7 @@ def check_hpa_dco(disk_path):
 
         elif system == 'Darwin':  # macOS
             # Use diskutil info to check for hidden areas
-            result = subprocess.run(['diskutil', 'info', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = subprocess.run(['diskutil', 'info', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=_PROBE_TIMEOUT)
             if result.returncode == 0:
                 if "Hidden" in result.stdout:
                     has_hidden_areas = True
@@ -1277,13 +1887,13 @@ def check_hpa_dco(disk_path):
 
 def remove_hpa_dco(disk_path):
     """Remove HPA/DCO from a disk. Returns success status and messages."""
-    system = platform.system()
+    system = _SYSTEM
     success = False
     messages = []
 
     try:
         if system == 'Linux':
-            if subprocess.run(['which', 'hdparm'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('hdparm'):
                 # Try to remove HPA
                 result = subprocess.run(['hdparm', '--yes-i-know-what-i-am-doing', '--native-max', disk_path],
                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
@@ -1312,22 +1922,36 @@ def remove_hpa_dco(disk_path):
 
     return success, messages
 
+# Blocks handed to the kernel per raw-disk write
+_RAW_WRITE_SEGMENTS = 8
+
 def write_to_raw_disk(disk_path, pattern='random', block_size=1048576):
     """Write directly to disk to ensure hidden areas are overwritten."""
     try:
         with open(disk_path, 'wb') as f:
-            # Write a full block of data
+            # Write several full blocks per syscall (random gets a fresh block
+            # per segment; the ring is as deep as the batch so none repeat)
+            next_random = None
             if pattern == 'random':
-                data = os.urandom(block_size)
-            elif pattern == 'ones':
-                data = b'\xFF' * block_size
-            else:  # zeroes
-                data = b'\x00' * block_size
+                next_random = random_stream(block_size, depth=_RAW_WRITE_SEGMENTS)
+            else:  # ones / zeroes
+                iov = [pattern_block(pattern, block_size)] * _RAW_WRITE_SEGMENTS
             
             try:
-                while True:
-                    f.write(data)
-                    f.flush()
+                if hasattr(os, 'writev'):
+                    fd = f.fileno()
+                    while True:
+                        if next_random:
+                            iov = [next_random() for _ in range(_RAW_WRITE_SEGMENTS)]
+                        if os.writev(fd, iov) == 0:
+                            break
+                else:
+                    # No vectored I/O on Windows; hand over one large buffer instead
+                    while True:
+                        if next_random:
+                            f.write(b''.join(next_random() for _ in range(_RAW_WRITE_SEGMENTS)))
+                        else:
+                            f.write(b''.join(iov))
             except OSError as e:
                 if e.errno != errno.ENOSPC:  # Ignore "no space left" errors
                     raise
@@ -1336,14 +1960,14 @@ def write_to_raw_disk(disk_path, pattern='random', block_size=1048576):
 
 def clear_smart_data(disk_path):
     """Clear SMART data and logs from the drive."""
-    system = platform.system()
+    system = _SYSTEM
     messages = []
     success = False
 
     try:
         if system == 'Linux':
             # Check for smartctl
-            if subprocess.run(['which', 'smartctl'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('smartctl'):
                 # Clear SMART logs
                 result = subprocess.run(['smartctl', '-C', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                 if result.returncode == 0:
@@ -1360,15 +1984,15 @@ def clear_smart_data(disk_path):
 
 def clear_drive_cache(disk_path):
     """Clear drive cache and buffer."""
-    system = platform.system()
+    system = _SYSTEM
     messages = []
     success = False
 
     try:
         if system == 'Linux':
-            if subprocess.run(['which', 'hdparm'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('hdparm'):
                 # Force cache flush
-                result = subprocess.run(['hdparm', '-F', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                result = subprocess.run(['hdparm', '-F', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=_PROBE_TIMEOUT)
                 if result.returncode == 0:
                     messages.append(f"{GREEN}Successfully flushed drive cache{RESET}")
                     success = True
@@ -1376,12 +2000,12 @@ def clear_drive_cache(disk_path):
                     messages.append(f"{YELLOW}Failed to flush drive cache: {result.stderr}{RESET}")
 
                 # Disable write cache if possible
-                subprocess.run(['hdparm', '-W0', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                subprocess.run(['hdparm', '-W0', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=_PROBE_TIMEOUT)
         
         elif system == 'Darwin':
             # On macOS, try to force a cache flush
-            subprocess.run(['diskutil', 'unmount', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            subprocess.run(['diskutil', 'mount', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            subprocess.run(['diskutil', 'unmount', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=_PROBE_TIMEOUT)
+            subprocess.run(['diskutil', 'mount', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=_PROBE_TIMEOUT)
             messages.append(f"{GREEN}Attempted to flush drive cache through unmount/mount{RESET}")
             success = True
     except Exception as e:
@@ -1391,13 +2015,13 @@ def clear_drive_cache(disk_path):
 
 def secure_erase_enhanced(disk_path):
     """Attempt enhanced secure erase if supported."""
-    system = platform.system()
+    system = _SYSTEM
     messages = []
     success = False
 
     try:
         if system == 'Linux':
-            if subprocess.run(['which', 'hdparm'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('hdparm'):
                 # Check if enhanced secure erase is supported
                 result = subprocess.run(['hdparm', '-I', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                 if "enhanced security erase" in result.stdout.lower():
@@ -1419,54 +2043,319 @@ def secure_erase_enhanced(disk_path):
 
 def handle_remapped_sectors(disk_path):
     """Handle remapped/reallocated sectors and defect lists."""
-    system = platform.system()
+    system = _SYSTEM
     messages = []
     success = False
 
     try:
         if system == 'Linux':
-            if subprocess.run(['which', 'smartctl'], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode == 0:
+            if _have('smartctl'):
                 # Get current reallocated sector count
-                result = subprocess.run(['smartctl', '-A', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                result = subprocess.run(['smartctl', '-A', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=_PROBE_TIMEOUT)
                 if "Reallocated_Sector_Ct" in result.stdout:
                     messages.append(f"{YELLOW}Drive has reallocated sectors - these will be included in secure wipe{RESET}")
                 
                 # Force reallocation of pending sectors
                 subprocess.run(['smartctl', '-t', 'select,0-max', disk_path], 
-                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=_PROBE_TIMEOUT)
                 success = True
     except Exception as e:
         messages.append(f"{YELLOW}Error handling remapped sectors: {e}{RESET}")
 
     return success, messages
 
+def _sysfs_disk(disk_path):
+    """The /sys/class/block directory of disk_path's whole disk (Linux)."""
+    # Partitions share their parent's queue settings
+    dev = os.path.realpath(os.path.join('/sys/class/block', os.path.basename(os.path.realpath(disk_path))))
+    if os.path.exists(os.path.join(dev, 'partition')):
+        dev = os.path.dirname(dev)
+    return dev
+
+def _is_ssd(disk_path):
+    """Return True if disk_path is a non-rotational device that accepts discards."""
+    if _SYSTEM != 'Linux':
+        return False
+    try:
+        dev = _sysfs_disk(disk_path)
+        with open(os.path.join(dev, 'queue', 'rotational')) as f:
+            if f.read().strip() != '0':
+                return False
+        with open(os.path.join(dev, 'queue', 'discard_max_bytes')) as f:
+            return int(f.read().strip()) > 0
+    except (OSError, ValueError):
+        return False
+
+def _discard_zeroes(disk_path):
+    """
+    Return True only if the device promises that discarded blocks read back
+    as zeroes: the kernel's discard_zeroes_data flag, an ATA drive with
+    deterministic read zeroes after TRIM (RZAT), or an NVMe namespace whose
+    DLFEAT says deallocated blocks read as zeroes. Anything unknown is False.
+    """
+    if _SYSTEM != 'Linux':
+        return False
+    try:
+        with open(os.path.join(_sysfs_disk(disk_path), 'queue', 'discard_zeroes_data')) as f:
+            if f.read().strip() == '1':
+                return True
+    except OSError:
+        pass
+    try:
+        if os.path.basename(disk_path).startswith('nvme'):
+            if _have('nvme'):
+                output = subprocess.check_output(['nvme', 'id-ns', disk_path], stderr=subprocess.STDOUT, encoding='utf-8')
+                match = re.search(r'^dlfeat\s*:\s*(\d+)', output, re.MULTILINE)
+                return bool(match) and int(match.group(1)) & 0x7 == 1
+        elif _have('hdparm'):
+            output = subprocess.check_output(['hdparm', '-I', disk_path], stderr=subprocess.STDOUT, encoding='utf-8')
+            return 'Deterministic read ZEROs after TRIM' in output
+    except (subprocess.SubprocessError, OSError, ValueError):
+        pass
+    return False
+
+def discard_disk(disk_path):
+    """Discard (TRIM) every block of an SSD. Returns success status and messages."""
+    messages = []
+    success = False
+
+    try:
+        if _SYSTEM == 'Linux':
+            if _have('blkdiscard'):
+                # blkdiscard refuses a disk with anything mounted on it, so
+                # unmount each of its partitions, innermost first
+                listing = subprocess.run(['lsblk', '-lnpo', 'NAME,MOUNTPOINT', disk_path],
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                for line in reversed(listing.stdout.splitlines()):
+                    fields = line.split(None, 1)
+                    if len(fields) == 2:
+                        result = subprocess.run(['umount', fields[1]], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                        if result.returncode != 0:
+                            messages.append(f"{YELLOW}Could not unmount {fields[1]}: {result.stderr.strip()}{RESET}")
+                result = subprocess.run(['blkdiscard', disk_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                if result.returncode == 0:
+                    messages.append(f"{GREEN}Successfully discarded all blocks on {disk_path}{RESET}")
+                    success = True
+                else:
+                    messages.append(f"{YELLOW}Failed to discard blocks: {result.stderr.strip()}{RESET}")
+            else:
+                messages.append(f"{YELLOW}blkdiscard not found; install util-linux to TRIM SSDs{RESET}")
+    except Exception as e:
+        messages.append(f"{YELLOW}Error discarding blocks: {e}{RESET}")
+
+    return success, messages
+
+def _step_banner(title):
+    """The three-line banner shown before each format_disk step."""
+    border = CYAN + BRIGHT
+    width = _box_width(58)
+    return '\n'.join((_box_edge(width, border, '╔', '╗'),
+                      _box_title(width, border, title),
+                      _box_edge(width, border, '╚', '╝')))
+
+
+def _parse_stream(argv, field_regexes, timeout=None):
+    """
+    Run argv and scan its output line by line for field_regexes
+    ({name: compiled regex}), stopping the tool as soon as every field has
+    matched. Returns {name: match}. Raises CalledProcessError like
+    check_output if the tool runs to completion and fails, and
+    TimeoutExpired if it is still running after timeout seconds.
+    """
+    found = {}
+    timed_out = []
+    with subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding='utf-8') as proc:
+        # Killing the tool closes its output, which ends the read loop
+        def expire():
+            timed_out.append(True)
+            proc.kill()
+        timer = threading.Timer(timeout, expire) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in proc.stdout:
+                for key, rx in field_regexes.items():
+                    if key not in found:
+                        match = rx.search(line)
+                        if match:
+                            found[key] = match
+                if len(found) == len(field_regexes):
+                    proc.terminate()
+                    break
+            else:
+                if proc.wait() != 0 and not timed_out:
+                    raise subprocess.CalledProcessError(proc.returncode, argv)
+        finally:
+            if timer:
+                timer.cancel()
+    if timed_out:
+        raise subprocess.TimeoutExpired(argv, timeout)
+    return found
+
+
+def _run_streaming(argv, on_line, input=None):
+    """
+    Run argv (feeding it input, if given) and pass each line of its combined
+    stdout/stderr to on_line as it arrives, so long-running tools show
+    their progress instead of all of it at the end. Returns the exit code.
+    """
+    with subprocess.Popen(argv, stdin=subprocess.PIPE if input is not None else None,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          encoding='utf-8', errors='replace', bufsize=1) as proc:
+        if input is not None:
+            proc.stdin.write(input)
+            proc.stdin.close()
+        for line in proc.stdout:
+            on_line(line.rstrip())
+        return proc.wait()
+
+
+def _get_disk_info(disk_path):
+    """Look up a disk's name and size. Returns (disk_info, messages)."""
+    system = _SYSTEM
+    disk_info = {}
+    disk_id = os.path.basename(disk_path)
+    messages = []
+    
+    try:
+        if system == 'Darwin':  # macOS
+            try:
+                # Get disk info using diskutil
+                found = _parse_stream(['diskutil', 'info', disk_id],
+                                      {'size': _RX_DARWIN_SIZE, 'name': _RX_DARWIN_NAME},
+                                      timeout=_PROBE_TIMEOUT)
+                
+                # Extract size info
+                size_match = found.get('size')
+                if size_match:
+                    size_bytes = int(size_match.group(1).replace(',', ''))
+                    size_human = size_match.group(2).strip()
+                    disk_info = {
+                        'size': size_bytes,
+                        'size_human': size_human
+                    }
+                    
+                # Extract name info
+                name_match = found.get('name')
+                if name_match:
+                    disk_info['name'] = name_match.group(1).strip()
+                else:
+                    disk_info['name'] = disk_id
+                    
+            except subprocess.SubprocessError as e:
+                messages.append(f"{YELLOW}Warning: Unable to get detailed disk information: {e}{RESET}")
+                
+        elif system == 'Linux':
+            try:
+                # Try to get disk info using lsblk
+                disk_info_cmd = subprocess.check_output(['lsblk', '-bdno', 'SIZE,MODEL', disk_path], 
+                                                      stderr=subprocess.STDOUT, encoding='utf-8',
+                                                      timeout=_PROBE_TIMEOUT).strip()
+                if disk_info_cmd:
+                    parts = disk_info_cmd.split()
+                    if parts:
+                        size_bytes = int(parts[0])
+                        disk_info['size'] = size_bytes
+                        disk_info['size_human'] = format_size(size_bytes)
+                        if len(parts) > 1:
+                            disk_info['name'] = ' '.join(parts[1:])
+                        else:
+                            disk_info['name'] = disk_id
+            except (subprocess.SubprocessError, FileNotFoundError):
+                try:
+                    # Fallback to fdisk
+                    found = _parse_stream(['fdisk', '-l', disk_path], {'size': _RX_FDISK_SIZE},
+                                          timeout=_PROBE_TIMEOUT)
+                    size_match = found.get('size')
+                    if size_match:
+                        disk_info['size_human'] = size_match.group(1)
+                        disk_info['name'] = disk_id
+                except (subprocess.SubprocessError, FileNotFoundError):
+                    messages.append(f"{YELLOW}Warning: Unable to get detailed disk information{RESET}")
+                    
+        elif system == 'Windows':
+            try:
+                # Get disk info using PowerShell
+                ps_cmd = f'Get-Disk | Where-Object {{ $_.DeviceId -eq "{disk_id}" }} | Format-List'
+                # Extract size and model info from the output
+                found = _parse_stream(['powershell', '-NoProfile', '-Command', ps_cmd],
+                                      {'size': _RX_WIN_SIZE, 'model': _RX_WIN_MODEL},
+                                      timeout=_PROBE_TIMEOUT)
+                size_match = found.get('size')
+                model_match = found.get('model')
+                
+                if size_match:
+                    size_bytes = int(size_match.group(1).replace(',', ''))
+                    disk_info['size'] = size_bytes
+                    disk_info['size_human'] = format_size(size_bytes)
+                
+                if model_match:
+                    disk_info['name'] = model_match.group(1).strip()
+                else:
+                    disk_info['name'] = f"Disk {disk_id}"
+                    
+            except (subprocess.SubprocessError, FileNotFoundError):
+                messages.append(f"{YELLOW}Warning: Unable to get detailed disk information{RESET}")
+    except Exception as e:
+        messages.append(f"{YELLOW}Warning: Error getting disk info: {e}{RESET}")
+    
+    return disk_info, messages
+
+
+def wipe_method_name(discarded, passes_done):
+    """How a format_disk run erased the disk, for the summary and certificates."""
+    methods = []
+    if discarded:
+        methods.append("TRIM/discard")
+    if passes_done:
+        methods.append(f"DoD 5220.22-M ({passes_done} passes)")
+    return " + ".join(methods) or "Format only (no overwrite completed)"
+
+
 def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, passes=3, pattern='all', verify=False):
-    """Format an entire disk with the specified filesystem."""
+    """
+    Format an entire disk with the specified filesystem.
+    
+    Returns (discarded, passes_done): whether the disk was TRIMmed and how
+    many overwrite passes completed; see wipe_method_name().
+    """
     # Banner is now only shown at program start, not here
     
     # Determine current operating system
-    system = platform.system()
+    system = _SYSTEM
+    
+    # Paths seen by an earlier call may have come or gone since
+    _exists.cache_clear()
     
     # Validate the disk path exists (skip strict check on Windows where we may pass a numeric disk id)
     if system != 'Windows':
-        if not os.path.exists(disk_path):
+        if not _exists(disk_path):
             print(f"{RED}{BRIGHT}Error: Disk {disk_path} not found.{RESET}")
             sys.exit(1)
 
     print(f"{YELLOW}Performing comprehensive secure disk preparation...{RESET}")
 
+    # The cache flush, remapped-sector and HPA/DCO checks and the disk info
+    # lookup are independent and mostly wait on their tools, so run them
+    # together and print the results in the usual order
+    probes = [clear_drive_cache, handle_remapped_sectors, check_hpa_dco]
+    if SELECTED_DISK_INFO is None:
+        probes.append(_get_disk_info)
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        results = list(pool.map(lambda probe: probe(disk_path), probes))
+
     # Clear drive cache first
-    success, messages = clear_drive_cache(disk_path)
+    success, messages = results[0]
     for msg in messages:
         print(msg)
 
     # Handle remapped sectors and defect lists
-    success, messages = handle_remapped_sectors(disk_path)
+    success, messages = results[1]
     for msg in messages:
         print(msg)
 
     # Check for and remove HPA/DCO
-    has_hidden, hpa_messages = check_hpa_dco(disk_path)
+    has_hidden, hpa_messages = results[2]
     for msg in hpa_messages:
         print(msg)
 
@@ -1496,92 +2385,18 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
     clear_drive_cache(disk_path)
     
     # Get disk information for confirmation
-    disk_info = {}
     disk_id = os.path.basename(disk_path)
     
     # Use the globally stored disk info if available
     if SELECTED_DISK_INFO is not None:
         disk_info = SELECTED_DISK_INFO
     else:
-        try:
-            if system == 'Darwin':  # macOS
-                try:
-                    # Get disk info using diskutil
-                    disk_info_cmd = subprocess.check_output(['diskutil', 'info', disk_id], 
-                                                          stderr=subprocess.STDOUT).decode('utf-8')
-                    
-                    # Extract size info
-                    size_match = re.search(r'Disk Size:\s+([0-9,]+)\s+Bytes\s+\(([^)]+)\)', disk_info_cmd)
-                    if size_match:
-                        size_bytes = int(size_match.group(1).replace(',', ''))
-                        size_human = size_match.group(2).strip()
-                        disk_info = {
-                            'size': size_bytes,
-                            'size_human': size_human
-                        }
-                        
-                    # Extract name info
-                    name_match = re.search(r'Device / Media Name:\s+(.+)', disk_info_cmd)
-                    if name_match:
-                        disk_info['name'] = name_match.group(1).strip()
-                    else:
-                        disk_info['name'] = disk_id
-                        
-                except subprocess.CalledProcessError as e:
-                    print(f"{YELLOW}Warning: Unable to get detailed disk information: {e}{RESET}")
-                    
-            elif system == 'Linux':
-                try:
-                    # Try to get disk info using lsblk
-                    disk_info_cmd = subprocess.check_output(['lsblk', '-bdno', 'SIZE,MODEL', disk_path], 
-                                                          stderr=subprocess.STDOUT).decode('utf-8').strip()
-                    if disk_info_cmd:
-                        parts = disk_info_cmd.split()
-                        if parts:
-                            size_bytes = int(parts[0])
-                            disk_info['size'] = size_bytes
-                            disk_info['size_human'] = format_size(size_bytes)
-                            if len(parts) > 1:
-                                disk_info['name'] = ' '.join(parts[1:])
-                            else:
-                                disk_info['name'] = disk_id
-                except (subprocess.CalledProcessError, FileNotFoundError):
-                    try:
-                        # Fallback to fdisk
-                        disk_info_cmd = subprocess.check_output(['fdisk', '-l', disk_path], 
-                                                              stderr=subprocess.STDOUT).decode('utf-8')
-                        size_match = re.search(r'Disk\s+.*?:\s+([0-9.]+\s+[A-Za-z]+)', disk_info_cmd)
-                        if size_match:
-                            disk_info['size_human'] = size_match.group(1)
-                            disk_info['name'] = disk_id
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        print(f"{YELLOW}Warning: Unable to get detailed disk information{RESET}")
-                        
-            elif system == 'Windows':
-                try:
-                    # Get disk info using PowerShell
-                    ps_cmd = f'Get-Disk | Where-Object {{ $_.DeviceId -eq "{disk_id}" }} | Format-List'
-                    disk_info_cmd = subprocess.check_output(['powershell', '-Command', ps_cmd], 
-                                                          stderr=subprocess.STDOUT).decode('utf-8')
-                    
-                    # Extract size and model info from the output
-                    size_match = re.search(r'Size\s*:\s*([0-9,]+)', disk_info_cmd)
-                    model_match = re.search(r'FriendlyName\s*:\s*(.+)', disk_info_cmd)
-                    
-                    if size_match:
-                        size_bytes = int(size_match.group(1).replace(',', ''))
-                        disk_info['size'] = size_bytes
-                        disk_info['size_human'] = format_size(size_bytes)
-                    
-                    if model_match:
-                        disk_info['name'] = model_match.group(1).strip()
-                    else:
-                        disk_info['name'] = f"Disk {disk_id}"
-                        
-                except (subprocess.CalledProcessError, FileNotFoundError):
-                    print(f"{YELLOW}Warning: Unable to get detailed disk information{RESET}")
-        except Exception as e:
-            print(f"{YELLOW}Warning: Error getting disk info: {e}{RESET}")
+        if has_hidden:
+            # Removing the HPA/DCO changes the visible size, so look again
+            results[3] = _get_disk_info(disk_path)
+        disk_info, messages = results[3]
+        for msg in messages:
+            print(msg)
     
     # If we couldn't get disk info, show a generic warning
     if not disk_info:
@@ -1601,67 +2416,61 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
     # (format + wipe + format again)
     time_estimate = estimate_operation_time(disk_size, passes, include_benchmark=False, path=None)
     
-    # Display warning message
-    box_width = 64  # Updated to 64 for consistent alignment
-    print(f"{RED}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-    print(f"{RED}{BRIGHT}║ !!! SECURE DISK ERASE WARNING !!!{' ' * (box_width - 33)}║{RESET}")
-    print(f"{RED}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-    
-    # Standardize spacing calculation for consistent right border alignment
-    # -2 accounts for the space after ║ and the ║ at the end
-    print(f"{RED}{BRIGHT}║{RESET} Target: {RED}{disk_path}{RESET}{' ' * (box_width - 8 - len(disk_path))}{RED}{BRIGHT}║{RESET}")
-    print(f"{RED}{BRIGHT}║{RESET} Disk Name: {RED}{disk_info.get('name', 'Unknown')}{RESET}{' ' * (box_width - 11 - len(disk_info.get('name', 'Unknown')))}{RED}{BRIGHT}║{RESET}")
-    
     # Get size from disk_info, ensuring we use the stored human-readable size
     size_display = disk_info.get('size_human', format_size(disk_info.get('size', 0)))
     if size_display == "0B":  # Fallback if we somehow got a zero size
         size_display = "Unknown"
-    print(f"{RED}{BRIGHT}║{RESET} Size: {RED}{size_display}{RESET}{' ' * (box_width - 6 - len(size_display))}{RED}{BRIGHT}║{RESET}")
     
-    print(f"{RED}{BRIGHT}║{RESET} Filesystem: {RED}{filesystem.upper()}{RESET}{' ' * (box_width - 12 - len(filesystem.upper()))}{RED}{BRIGHT}║{RESET}")
+    # SSDs are discarded first. Only when the drive guarantees discarded
+    # blocks read back as zeroes is the overwrite skipped.
+    ssd = _is_ssd(disk_path)
+    discard_only = ssd and _discard_zeroes(disk_path)
+    
+    # Display warning message, built up front and written in one go
+    box_width = _box_width(64)
+    border = RED + BRIGHT
+    rows = [
+        _box_edge(box_width, border, '╔', '╗'),
+        _box_title(box_width, border, "!!! SECURE DISK ERASE WARNING !!!"),
+        _box_edge(box_width, border, '╠', '╣'),
+        _box_row(box_width, border, ('', "Target: "), (RED, disk_path)),
+        _box_row(box_width, border, ('', "Disk Name: "), (RED, disk_info.get('name', 'Unknown'))),
+        _box_row(box_width, border, ('', "Size: "), (RED, size_display)),
+        _box_row(box_width, border, ('', "Filesystem: "), (RED, filesystem.upper())),
+    ]
     if label:
-        print(f"{RED}{BRIGHT}║{RESET} Label: {RED}{label}{RESET}{' ' * (box_width - 7 - len(label))}{RED}{BRIGHT}║{RESET}")
-    print(f"{RED}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-    
-    # Add time estimate information
-    print(f"{RED}{BRIGHT}║{RESET} Estimated time: {YELLOW}{time_estimate['estimated_human']}{RESET}{' ' * (box_width - 17 - len(time_estimate['estimated_human']))}{RED}{BRIGHT}║{RESET}")
-    print(f"{RED}{BRIGHT}║{RESET} Completion: {YELLOW}{time_estimate['completion_time']}{RESET}{' ' * (box_width - 13 - len(time_estimate['completion_time']))}{RED}{BRIGHT}║{RESET}")
-    print(f"{RED}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-    
-    # Break these warning messages into multiple lines if needed
-    warnings = [
-        "This operation will SECURELY ERASE ALL DATA on the disk.",
-        "The disk will be formatted, overwritten, then formatted again.",
-        "This CANNOT be undone. All files will be PERMANENTLY DELETED."
+        rows.append(_box_row(box_width, border, ('', "Label: "), (RED, label)))
+    rows += [
+        _box_edge(box_width, border, '╠', '╣'),
+        _box_row(box_width, border, ('', "Estimated time: "), (YELLOW, time_estimate['estimated_human'])),
+        _box_row(box_width, border, ('', "Completion: "), (YELLOW, time_estimate['completion_time'])),
+        _box_edge(box_width, border, '╠', '╣'),
+        _box_row(box_width, border, ('', "This operation will SECURELY ERASE ALL DATA on the disk.")),
+        _box_row(box_width, border, ('', "SSD: all blocks will be discarded (TRIM), then formatted." if discard_only
+                                         else "SSD: all blocks will be discarded (TRIM), then overwritten." if ssd
+                                         else "The disk will be formatted, overwritten, then formatted again.")),
+        _box_row(box_width, border, ('', "This CANNOT be undone. All files will be PERMANENTLY DELETED.")),
+        _box_edge(box_width, border, '╚', '╝'),
     ]
-    
-    for warning in warnings:
-        print(f"{RED}{BRIGHT}║{RESET} {warning}{' ' * (box_width - len(warning))}{RED}{BRIGHT}║{RESET}")
-    
-    print(f"{RED}{BRIGHT}╚═{'═' * box_width}╝{RESET}\n")
+    sys.stdout.write('\n'.join(rows) + '\n\n')
     
     # Get confirmation before starting
     if not no_confirm:
         # Simplified confirmation text
         confirmation_text = "I UNDERSTAND"
         
-        # Box width (excluding borders)
-        box_width = 64  # Adjusted for proper right border alignment
-        
         # Print the confirmation box
-        print(f"{RED}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-        print(f"{RED}{BRIGHT}║ CRITICAL CONFIRMATION REQUIRED{' ' * (box_width - 30)}║{RESET}")
-        print(f"{RED}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-        
-        # Apply consistent padding for the right border
-        print(f"{RED}{BRIGHT}║{RESET} This operation {RED}CANNOT{RESET} be undone!{' ' * (box_width - 32)}{RED}{BRIGHT}║{RESET}")
-        
-        # Simplified confirmation message with proper padding
-        msg = f"To confirm, please type exactly: \"{confirmation_text}\""
-        print(f"{RED}{BRIGHT}║{RESET} {msg}{' ' * (box_width - len(msg))}{RED}{BRIGHT}║{RESET}")
-        
-        print(f"{RED}{BRIGHT}╚═{'═' * box_width}╝{RESET}")
+        rows = [
+            _box_edge(box_width, border, '╔', '╗'),
+            _box_title(box_width, border, "CRITICAL CONFIRMATION REQUIRED"),
+            _box_edge(box_width, border, '╠', '╣'),
+            _box_row(box_width, border, ('', "This operation "), (RED, "CANNOT"), ('', " be undone!")),
+            _box_row(box_width, border, ('', f"To confirm, please type exactly: \"{confirmation_text}\"")),
+            _box_edge(box_width, border, '╚', '╝'),
+        ]
+        sys.stdout.write('\n'.join(rows) + '\n')
         print(f"{YELLOW}Confirmation: {RESET}", end="")
+        sys.stdout.flush()
         response = input().strip()
         
         if response != confirmation_text:
@@ -1691,7 +2500,7 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 disk_label = label if label else "FORMATTED"
                 
                 # Check if disk_id is a partition or a whole disk
-                is_partition = bool(re.search(r'disk\d+s\d+', disk_id))
+                is_partition = bool(_RX_PARTITION.search(disk_id))
                 
                 if is_partition:
                     # For partitions/volumes, use eraseVolume
@@ -1704,15 +2513,10 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 print(f"{YELLOW}Executing: {' '.join(format_args)}{RESET}")
                 
                 # Execute the format command
-                result = subprocess.run(format_args, capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    print(f"{RED}{BRIGHT}Error formatting disk:{RESET}")
-                    print(f"{result.stderr}")
-                    sys.exit(1)
-                
                 print(f"{GREEN}Disk formatting output:{RESET}")
-                print(result.stdout)
+                if _run_streaming(format_args, print) != 0:
+                    print(f"{RED}{BRIGHT}Error formatting disk.{RESET}")
+                    sys.exit(1)
                 
             elif system == 'Linux':
                 # Linux formatting approach
@@ -1766,15 +2570,10 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 print(f"{YELLOW}Executing: {' '.join(cmd)}{RESET}")
                 
                 try:
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    
-                    if result.returncode != 0:
-                        print(f"{RED}{BRIGHT}Error formatting disk:{RESET}")
-                        print(f"{result.stderr}")
-                        sys.exit(1)
-                    
                     print(f"{GREEN}Disk formatting output:{RESET}")
-                    print(result.stdout)
+                    if _run_streaming(cmd, print) != 0:
+                        print(f"{RED}{BRIGHT}Error formatting disk.{RESET}")
+                        sys.exit(1)
                     
                 except FileNotFoundError:
                     print(f"{RED}Error: Required formatting tool not found. You may need to install the appropriate package.{RESET}")
@@ -1783,10 +2582,7 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 
             elif system == 'Windows':
                 # Windows formatting approach
-                # For the disk formatting, we'll use diskpart with a script file
-                
-                # Create a temporary script file for diskpart
-                script_file = os.path.join(tempfile.gettempdir(), 'diskpart_script.txt')
+                # diskpart reads its commands from stdin, so no script file is needed
                 
                 # Map filesystem names to Windows format names
                 fs_map = {
@@ -1801,51 +2597,52 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 
                 try:
                     # Derive numeric disk number for diskpart even if a PhysicalDrive path was provided
-                    disk_num_match = re.search(r"(\d+)$", disk_id)
+                    disk_num_match = _RX_DISKNUM.search(disk_id)
                     disk_num = disk_num_match.group(1) if disk_num_match else disk_id
-                    # Write the diskpart script
-                    with open(script_file, 'w') as f:
-                        f.write(f"select disk {disk_num}\n")
-                        f.write("clean\n")
-                        f.write("create partition primary\n")
-                        f.write("select partition 1\n")
-                        f.write(f"format fs={fs_format} quick")
-                        if label:
-                            f.write(f" label=\"{label}\"")
-                        f.write("\n")
-                        f.write("assign\n")
-                        f.write("exit\n")
+                    # Build the diskpart script
+                    format_line = f"format fs={fs_format} quick"
+                    if label:
+                        format_line += f" label=\"{label}\""
+                    script_lines = [
+                        f"select disk {disk_num}",
+                        "clean",
+                        "create partition primary",
+                        "select partition 1",
+                        format_line,
+                        "assign",
+                        "exit",
+                    ]
                     
                     # Execute diskpart with the script
                     print(f"{YELLOW}Executing diskpart with the following commands:{RESET}")
-                    with open(script_file, 'r') as f:
-                        for line in f:
-                            print(f"{YELLOW}  {line.strip()}{RESET}")
+                    for line in script_lines:
+                        print(f"{YELLOW}  {line}{RESET}")
                     
-                    result = subprocess.run(['diskpart', '/s', script_file], capture_output=True, text=True)
+                    # Unlike /s, a piped script keeps going after a failed
+                    # command, so look for diskpart's error banners too
+                    failed = []
                     
-                    if result.returncode != 0:
-                        print(f"{RED}{BRIGHT}Error formatting disk:{RESET}")
-                        print(f"{result.stderr}")
-                        sys.exit(1)
+                    def show(line):
+                        print(line)
+                        if 'DiskPart has encountered an error' in line or 'Virtual Disk Service error' in line:
+                            failed.append(line)
                     
                     print(f"{GREEN}Disk formatting output:{RESET}")
-                    print(result.stdout)
+                    returncode = _run_streaming(['diskpart'], show, input='\n'.join(script_lines) + '\n')
+                    if returncode != 0 or failed:
+                        print(f"{RED}{BRIGHT}Error formatting disk.{RESET}")
+                        sys.exit(1)
                     
                 except Exception as e:
                     print(f"{RED}Error during Windows disk formatting: {e}{RESET}")
                     sys.exit(1)
-                finally:
-                    # Clean up the temporary script file
-                    try:
-                        os.remove(script_file)
-                    except:
-                        pass
                 
             else:
                 print(f"{RED}Error: Disk formatting not supported on {system}.{RESET}")
                 sys.exit(1)
-                
+            
+            # The disk's mount point may have changed
+            _exists.cache_clear()
             return True
             
         except Exception as e:
@@ -1858,21 +2655,21 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
         if system == 'Darwin':  # macOS
             try:
                 # For macOS, use diskutil info to get the mount point
-                info = subprocess.check_output(['diskutil', 'info', disk_id], 
-                                            stderr=subprocess.STDOUT).decode('utf-8')
+                found = _parse_stream(['diskutil', 'info', disk_id],
+                                      {'mount': _RX_MOUNT, 'volume': _RX_VOL})
                 
                 # Check for mount point in the output
-                mount_match = re.search(r'Mount Point:\s+(.+)', info)
+                mount_match = found.get('mount')
                 if mount_match:
                     return mount_match.group(1).strip()
                     
                 # Check for volume path if mount point not found
-                vol_match = re.search(r'Volume Name:\s+(.+)', info)
+                vol_match = found.get('volume')
                 if vol_match:
                     vol_name = vol_match.group(1).strip()
                     # Check if the volume is mounted in /Volumes
                     vol_path = f"/Volumes/{vol_name}"
-                    if os.path.exists(vol_path):
+                    if _exists(vol_path):
                         return vol_path
             except:
                 pass
@@ -1881,7 +2678,7 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
             try:
                 # For Linux, use lsblk to get the mount point
                 mount_info = subprocess.check_output(['lsblk', '-no', 'MOUNTPOINT', disk_path], 
-                                                    stderr=subprocess.STDOUT).decode('utf-8').strip()
+                                                    stderr=subprocess.STDOUT, encoding='utf-8').strip()
                 if mount_info:
                     return mount_info
             except:
@@ -1892,12 +2689,12 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
                 # For Windows, use wmic to get the drive letter
                 drive_letter = None
                 # Accept PhysicalDrive path, numeric id, or plain id string
-                disk_num_match = re.search(r'(\d+)$', disk_path)
+                disk_num_match = _RX_DISKNUM.search(disk_path)
                 if disk_num_match:
                     disk_num = disk_num_match.group(1)
                     ps_cmd = f'Get-Partition -DiskNumber {disk_num} | Select-Object -ExpandProperty DriveLetter'
-                    drive_letter = subprocess.check_output(['powershell', '-Command', ps_cmd], 
-                                                         stderr=subprocess.STDOUT).decode('utf-8').strip()
+                    drive_letter = subprocess.check_output(['powershell', '-NoProfile', '-Command', ps_cmd], 
+                                                         stderr=subprocess.STDOUT, encoding='utf-8').strip()
                     if drive_letter:
                         return f"{drive_letter}:\\"
             except:
@@ -1907,292 +2704,239 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
         return None
     
     try:
-        # Step 1: Initial format to prepare the disk
-        print(f"{CYAN}{BRIGHT}╔═══════════════════════════════════════════════════════════╗{RESET}")
-        print(f"{CYAN}{BRIGHT}║ STEP 1: INITIAL DISK FORMAT                               ║{RESET}")
-        print(f"{CYAN}{BRIGHT}╚═══════════════════════════════════════════════════════════╝{RESET}")
-        perform_format("Formatting")
-        
-        # Step 2: Wipe free space on the newly formatted disk
-        print(f"\n{CYAN}{BRIGHT}╔═══════════════════════════════════════════════════════════╗{RESET}")
-        print(f"{CYAN}{BRIGHT}║ STEP 2: SECURE FREE SPACE WIPE                            ║{RESET}")
-        print(f"{CYAN}{BRIGHT}╚═══════════════════════════════════════════════════════════╝{RESET}")
-        
-        # Get the mount point of the newly formatted disk
-        mount_point = get_disk_mountpoint()
+        # A drive that reads discarded blocks back as zeroes is done after
+        # the discard and one format; any other SSD still gets the passes
+        discarded = False
+        passes_done = 0
+        if ssd:
+            print(_step_banner("STEP 1: DISCARD ALL BLOCKS (SSD)"))
+            discarded, messages = discard_disk(disk_path)
+            for msg in messages:
+                print(msg)
+            if not discarded:
+                print(f"{YELLOW}Falling back to format, overwrite and format.{RESET}\n")
+            elif not discard_only:
+                print(f"{YELLOW}The drive does not report that discarded blocks read back as zeroes; overwriting as well.{RESET}\n")
         
-        if mount_point:
-            print(f"{GREEN}Disk mounted at: {mount_point}{RESET}")
+        if discarded and discard_only:
+            print("\n" + _step_banner("STEP 2: DISK FORMAT"))
+            perform_format("Formatting")
+        else:
+            # Step 1: Initial format to prepare the disk
+            print(_step_banner("STEP 1: INITIAL DISK FORMAT"))
+            perform_format("Formatting")
             
-            # Directly fill the disk with patterns instead of using the interactive wipe_free_space function
-            try:
-                # Get free space information
-                free_space = get_free_space(mount_point)
-                free_space_display = format_size(free_space)
-                print(f"{GREEN}Free space to wipe: {free_space_display}{RESET}")
-                
-                # Create temporary file path
-                fname = os.path.join(mount_point, '.Securewipe_Complete_disk.tmp')
-                temp_files = [fname]
-                
-                # Set up cleanup function
-                def cleanup_temp_files():
-                    for temp_file in temp_files:
-                        try:
-                            if os.path.exists(temp_file):
-                                os.remove(temp_file)
-                                print(f"\n{GREEN}Cleaned up temporary file: {temp_file}{RESET}")
-                        except Exception as e:
-                            print(f"\n{YELLOW}Warning: Could not remove temporary file {temp_file}: {e}{RESET}")
-                
-                # Register cleanup for exit
-                atexit.register(cleanup_temp_files)
+            # Step 2: Wipe free space on the newly formatted disk
+            print("\n" + _step_banner("STEP 2: SECURE FREE SPACE WIPE"))
+            
+            # Get the mount point of the newly formatted disk
+            mount_point = get_disk_mountpoint()
+            
+            if mount_point:
+                print(f"{GREEN}Disk mounted at: {mount_point}{RESET}")
                 
-                # Container for progress bar reference
-                progress_bar_container = {'instance': None}
+                # Temp files are removed and the previous SIGINT handler
+                # restored however the wipe ends
+                cleanup = contextlib.ExitStack()
                 
-                # Setup signal handler for CTRL+C
-                def signal_handler(sig, frame):
-                    if progress_bar_container['instance'] is not None:
-                        progress_bar = progress_bar_container['instance']
-                        progress_bar.disable = True
-                        progress_bar_container['instance'] = None
+                # Directly fill the disk with patterns instead of using the interactive wipe_free_space function
+                try:
+                    # Get free space information
+                    free_space = get_free_space(mount_point)
+                    free_space_display = format_size(free_space)
+                    print(f"{GREEN}Free space to wipe: {free_space_display}{RESET}")
                     
-                    print(f"\n\n{YELLOW}Operation interrupted by user. Cleaning up...{RESET}")
-                    cleanup_temp_files()
-                    print(f"{RED}Wiping operation canceled.{RESET}")
-                    sys.exit(130)
-                
-                # Save original handler and set new one
-                original_handler = signal.getsignal(signal.SIGINT)
-                signal.signal(signal.SIGINT, signal_handler)
-                
-                # Get time estimate for the wiping operation
-                wipe_time_estimate = estimate_operation_time(free_space, passes, include_benchmark=True, path=mount_point)
-                
-                # Display wiping information
-                passes = passes
-                block_size = 1048576  # 1MB block size
-                pattern = pattern
-                
-                box_width = 65
-                print(f"{CYAN}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-                print(f"{CYAN}{BRIGHT}║ SECURE FREE SPACE WIPING{' ' * (box_width - 24)}║{RESET}")
-                print(f"{CYAN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Target: {GREEN}{mount_point}{' ' * (box_width - 9 - len(mount_point) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Free space: {GREEN}{free_space_display}{' ' * (box_width - 13 - len(free_space_display) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Passes: {GREEN}{passes}{' ' * (box_width - 9 - len(str(passes)) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Block size: {GREEN}{format_size(block_size)}{' ' * (box_width - 13 - len(format_size(block_size)) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Pattern: {GREEN}{pattern}{' ' * (box_width - 10 - len(pattern) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Estimated time: {YELLOW}{wipe_time_estimate['estimated_human']}{' ' * (box_width - 17 - len(wipe_time_estimate['estimated_human']) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}║{RESET} Completion: {YELLOW}{wipe_time_estimate['completion_time']}{' ' * (box_width - 13 - len(wipe_time_estimate['completion_time']) + 1)}{CYAN}{BRIGHT}║{RESET}")
-                print(f"{CYAN}{BRIGHT}╚═{'═' * box_width}╝{RESET}\n")
-                
-                # Start time for overall ETA calculation
-                overall_start_time = time.time()
-                
-                # Perform the wiping with multiple passes
-                for p in range(passes):
-                    # Determine pattern based on pass number
-                    if pattern == 'all':
-                        if p == 0:
-                            mode = 'random'
-                        else:
-                            mode = {1: 'zeroes', 2: 'ones'}.get(p % 3, 'random')
-                    else:
-                        mode = pattern
+                    # Create temporary file path
+                    fname = os.path.join(mount_point, '.Securewipe_Complete_disk.tmp')
+                    temp_files = {fname}
                     
-                    pass_color = [GREEN, YELLOW, CYAN, MAGENTA, BLUE][p % 5]
-                    print(f"{pass_color}Pass {p+1}/{passes}: filling free space with {mode}{RESET}")
+                    # Set up cleanup function
+                    def cleanup_temp_files():
+                        for temp_file in list(temp_files):
+                            try:
+                                if os.path.exists(temp_file):
+                                    os.remove(temp_file)
+                                    print(f"\n{GREEN}Cleaned up temporary file: {temp_file}{RESET}")
+                            except Exception as e:
+                                print(f"\n{YELLOW}Warning: Could not remove temporary file {temp_file}: {e}{RESET}")
                     
-                    # Calculate and display overall ETA if we've already completed at least one pass
-                    if p > 0:
-                        elapsed_time = time.time() - overall_start_time
-                        avg_time_per_pass = elapsed_time / p
-                        remaining_passes = passes - p
-                        overall_eta_seconds = avg_time_per_pass * remaining_passes
-                        
-                        overall_eta = format_time_human_readable(overall_eta_seconds, abbreviated=False)
-                        overall_eta_time = time.strftime("%I:%M %p", time.localtime(time.time() + overall_eta_seconds))
-                        print(f"{YELLOW}Overall ETA: {overall_eta} (complete at approximately {overall_eta_time}){RESET}")
+                    cleanup.callback(cleanup_temp_files)
+                    
+                    # Container for progress bar reference
+                    progress_bar_container = {'instance': None}
+                    
+                    # Setup signal handler for CTRL+C
+                    def signal_handler(sig, frame):
+                        if progress_bar_container['instance'] is not None:
+                            progress_bar = progress_bar_container['instance']
+                            progress_bar.disable = True
+                            progress_bar_container['instance'] = None
                         
-                    # Initialize variables for custom progress tracking
-                    pass_start_time = time.time()
-                    written = 0
-                    last_display_time = 0
-                    time_line = ""
+                        print(f"\n\n{YELLOW}Operation interrupted by user. Cleaning up...{RESET}")
+                        cleanup_temp_files()
+                        print(f"{RED}Wiping operation canceled.{RESET}")
+                        sys.exit(130)
                     
-                    # First print the time line that we'll update in place
-                    time_line = "Elapsed: 00:00:00 • Remaining: calculating..."
-                    print(time_line)
+                    cleanup.enter_context(_sigint(signal_handler))
                     
-                    # Create a progress bar
-                    progress_format = '{percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt}'
-                    progress_bar = tqdm(total=free_space, unit='B', unit_scale=True, 
-                                     unit_divisor=1024,
-                                     bar_format=progress_format,
-                                     leave=True)
+                    # Get time estimate for the wiping operation
+                    wipe_time_estimate = estimate_operation_time(free_space, passes, include_benchmark=True, path=mount_point)
                     
-                    # Store reference for signal handler
-                    progress_bar_container['instance'] = progress_bar
+                    # Display wiping information
+                    passes = passes
+                    block_size = 1048576  # 1MB block size
+                    block_size_str = format_size(block_size)
+                    pattern = pattern
                     
-                    # Create a unique temporary file for each pass
-                    fname = os.path.join(mount_point, f'.Securewipe_Complete_disk_{p+1}.tmp')
-                    if fname not in temp_files:
-                        temp_files.append(fname)
-                        
-                    # Make sure any previous temp files are deleted
-                    try:
-                        if os.path.exists(fname):
-                            os.remove(fname)
-                    except:
-                        pass
+                    box_width = _box_width(65)
+                    border = CYAN + BRIGHT
+                    rows = [
+                        _box_edge(box_width, border, '╔', '╗'),
+                        _box_title(box_width, border, 'SECURE FREE SPACE WIPING'),
+                        _box_edge(box_width, border, '╠', '╣'),
+                        _box_row(box_width, border, ('', "Target: "), (GREEN, mount_point)),
+                        _box_row(box_width, border, ('', "Free space: "), (GREEN, free_space_display)),
+                        _box_row(box_width, border, ('', "Passes: "), (GREEN, str(passes))),
+                        _box_row(box_width, border, ('', "Block size: "), (GREEN, block_size_str)),
+                        _box_row(box_width, border, ('', "Pattern: "), (GREEN, pattern)),
+                        _box_edge(box_width, border, '╠', '╣'),
+                        _box_row(box_width, border, ('', "Estimated time: "), (YELLOW, wipe_time_estimate['estimated_human'])),
+                        _box_row(box_width, border, ('', "Completion: "), (YELLOW, wipe_time_estimate['completion_time'])),
+                        _box_edge(box_width, border, '╚', '╝'),
+                    ]
+                    sys.stdout.write('\n'.join(rows) + '\n\n')
                     
-                    try:
-                        with open(fname, 'wb') as f:
-                            while True:
-                                if mode == 'random':
-                                    chunk = os.urandom(block_size)
-                                elif mode == 'ones':
-                                    chunk = b'\xFF' * block_size
-                                elif mode == 'zeroes':
-                                    chunk = b'\x00' * block_size
-                                else:  # Should never happen
-                                    chunk = os.urandom(block_size)
-                                
-                                try:
-                                    f.write(chunk)
-                                    written += block_size
-                                    
-                                    # Update display periodically
-                                    current_time = time.time()
-                                    if current_time - last_display_time >= 0.5:  # Update twice per second
-                                        # Calculate elapsed and remaining time
-                                        elapsed_seconds = current_time - pass_start_time
-                                        
-                                        # Format elapsed time
-                                        elapsed_str = format_time_human_readable(elapsed_seconds, abbreviated=True)
-                                        
-                                        # Calculate remaining time based on current speed
-                                        if written > 0:
-                                            bytes_per_second = written / elapsed_seconds
-                                            remaining_seconds = (free_space - written) / bytes_per_second if bytes_per_second > 0 else 0
-                                            remaining_str = format_time_human_readable(remaining_seconds, abbreviated=True)
-                                        else:
-                                            remaining_str = "calculating..."
-                                        
-                                        # Create new time line
-                                        new_time_line = f"Elapsed: {elapsed_str} • Remaining: {remaining_str}"
-                                        
-                                        # Only update if the line has changed
-                                        if new_time_line != time_line:
-                                            # Move cursor up one line and clear it
-                                            sys.stdout.write("\033[F\033[K")
-                                            sys.stdout.write(new_time_line + "\n")
-                                            sys.stdout.flush()
-                                            time_line = new_time_line
-                                        
-                                        last_display_time = current_time
-                                    
-                                    # Update the progress
-                                    progress_bar.update(block_size)
-                                    
-                                    # Occasional flush
-                                    if written % (block_size * 100) == 0:
-                                        f.flush()
-                                        
-                                except OSError as e:
-                                    if e.errno == errno.ENOSPC:
-                                        # Disk is full, which is what we want
-                                        break
-                                    else:
-                                        print(f"\n{YELLOW}Error: {e}{RESET}", file=sys.stderr)
-                                        break
-                                
-                    except Exception as e:
-                        print(f"\n{YELLOW}Error during wiping: {e}{RESET}")
-                    finally:
-                        # Close the progress bar
-                        progress_bar.close()
-                        progress_bar_container['instance'] = None
+                    # Start time for overall ETA calculation
+                    overall_start_time = time.time()
+                    
+                    # Perform the wiping with multiple passes
+                    for p, (mode, pass_color) in enumerate(_build_schedule(pattern, passes)):
+                        print(f"{pass_color}Pass {p+1}/{passes}: filling free space with {mode}{RESET}")
                         
-                        # Force sync and flush before removing
+                        # Calculate and display overall ETA if we've already completed at least one pass
+                        if p > 0:
+                            elapsed_time = time.time() - overall_start_time
+                            avg_time_per_pass = elapsed_time / p
+                            remaining_passes = passes - p
+                            overall_eta_seconds = avg_time_per_pass * remaining_passes
+                            
+                            overall_eta = format_time_human_readable(int(overall_eta_seconds), abbreviated=False)
+                            overall_eta_time = time.strftime("%I:%M %p", time.localtime(time.time() + overall_eta_seconds))
+                            print(f"{YELLOW}Overall ETA: {overall_eta} (complete at approximately {overall_eta_time}){RESET}")
+                            
+                        # Create a progress bar; tqdm tracks elapsed/remaining itself
+                        progress_format = '{percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]'
+                        progress_bar = tqdm(total=free_space, unit='B', unit_scale=True, 
+                                         unit_divisor=1024,
+                                         bar_format=progress_format,
+                                         mininterval=_BAR_INTERVAL,
+                                         leave=True)
+                        
+                        # Store reference for signal handler
+                        progress_bar_container['instance'] = progress_bar
+                        
+                        # Create a unique temporary file for each pass
+                        fname = os.path.join(mount_point, f'.Securewipe_Complete_disk_{p+1}.tmp')
+                        temp_files.add(fname)
+                            
+                        # Make sure any previous temp files are deleted
                         try:
-                            if 'f' in locals() and hasattr(f, 'fileno'):
-                                os.fsync(f.fileno())
-                        except Exception:
+                            if os.path.exists(fname):
+                                os.remove(fname)
+                        except:
                             pass
+                        
+                        written = 0
+                        error = None
+                        try:
+                            with open(fname, 'wb') as f:
+                                written, error = wipe_fill(f, mode, free_space, block_size, progress_bar,
+                                                            wipe_time_estimate['estimated_speed'], verify=verify)
+                            if error is not None:
+                                print(f"\n{YELLOW}Error: {error}{RESET}", file=sys.stderr)
+                        except Exception as e:
+                            error = e
+                            print(f"\n{YELLOW}Error during wiping: {e}{RESET}")
+                        finally:
+                            # Close the progress bar
+                            progress_bar.close()
+                            progress_bar_container['instance'] = None
+                        
+                        # Always delete the temporary file after each pass
+                        try:
+                            if os.path.exists(fname):
+                                os.remove(fname)
+                                temp_files.discard(fname)  # Remove from the cleanup list since we handled it
+                        except OSError as e:
+                            print(f"\n{YELLOW}Warning: Could not remove temporary file: {e}{RESET}")
+                            # Try to ensure the file is deleted by forcing unmount/remount if needed
+                            if system == 'Darwin':  # macOS
+                                try:
+                                    # For macOS, try using diskutil to unmount and remount
+                                    print(f"{YELLOW}Attempting to unmount and remount volume to clean up...{RESET}")
+                                    subprocess.run(['diskutil', 'unmount', mount_point], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+                                    subprocess.run(['diskutil', 'mount', disk_path], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+                                except:
+                                    pass
+                        
+                        if error is None:
+                            passes_done += 1
+                        wiped = format_size(min(written, free_space))
+                        print(f"{GREEN}✓ Pass {p+1} complete, wiped ~{wiped}{RESET}")
+                        print("")  # Empty line between passes
                     
-                    # Always delete the temporary file after each pass
-                    try:
-                        if os.path.exists(fname):
-                            os.remove(fname)
-                            if fname in temp_files:  # Add check to prevent ValueError
-                                temp_files.remove(fname)  # Remove from the cleanup list since we handled it
-                    except OSError as e:
-                        print(f"\n{YELLOW}Warning: Could not remove temporary file: {e}{RESET}")
-                        # Try to ensure the file is deleted by forcing unmount/remount if needed
-                        if system == 'Darwin':  # macOS
-                            try:
-                                # For macOS, try using diskutil to unmount and remount
-                                print(f"{YELLOW}Attempting to unmount and remount volume to clean up...{RESET}")
-                                subprocess.run(['diskutil', 'unmount', mount_point], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
-                                subprocess.run(['diskutil', 'mount', disk_path], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
-                            except:
-                                pass
+                    # Calculate total time taken
+                    total_time = time.time() - overall_start_time
+                    time_str = format_time_human_readable(total_time, abbreviated=False)
                     
-                    wiped = format_size(min(written, free_space))
-                    print(f"{GREEN}✓ Pass {p+1} complete, wiped ~{wiped}{RESET}")
-                    print("")  # Empty line between passes
-                
-                # Calculate total time taken
-                total_time = time.time() - overall_start_time
-                time_str = format_time_human_readable(total_time, abbreviated=False)
-                
-                # Summary
-                box_width = 65
-                print(f"{GREEN}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-                print(f"{GREEN}{BRIGHT}║ WIPING COMPLETE{' ' * (box_width - 15)}║{RESET}")
-                print(f"{GREEN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-                print(f"{GREEN}{BRIGHT}║{RESET} Total passes: {GREEN}{passes}{' ' * (box_width - 15 - len(str(passes)) + 1)}{GREEN}{BRIGHT}║{RESET}")
-                
-                total_wiped = format_size(min(written*passes, free_space))
-                print(f"{GREEN}{BRIGHT}║{RESET} Total wiped: {GREEN}{total_wiped}{' ' * (box_width - 14 - len(total_wiped) + 1)}{GREEN}{BRIGHT}║{RESET}")
-                print(f"{GREEN}{BRIGHT}║{RESET} Time taken: {GREEN}{time_str}{' ' * (box_width - 13 - len(time_str) + 1)}{GREEN}{BRIGHT}║{RESET}")
-                print(f"{GREEN}{BRIGHT}╚═{'═' * box_width}╝{RESET}")
-                
-                # Restore original signal handler
-                signal.signal(signal.SIGINT, original_handler)
-                
-                # Unregister the cleanup function since we'll clean up here
-                atexit.unregister(cleanup_temp_files)
-                cleanup_temp_files()
-                
-            except Exception as e:
-                print(f"{RED}Error during free space wiping: {e}{RESET}")
-                print(f"{YELLOW}Continuing with final formatting...{RESET}")
-        else:
-            print(f"{YELLOW}Warning: Could not determine mount point for disk {disk_path}.{RESET}")
-            print(f"{YELLOW}Skipping free space wiping. The disk may not be fully secure.{RESET}")
-        
-        # Step 3: Final format to complete the secure erase
-        print(f"\n{CYAN}{BRIGHT}╔═══════════════════════════════════════════════════════════╗{RESET}")
-        print(f"{CYAN}{BRIGHT}║ STEP 3: FINAL DISK FORMAT                                 ║{RESET}")
-        print(f"{CYAN}{BRIGHT}╚═══════════════════════════════════════════════════════════╝{RESET}")
-        perform_format("Final formatting")
-        
+                    # Summary
+                    box_width = _box_width(65)
+                    border = GREEN + BRIGHT
+                    total_wiped = format_size(min(written*passes, free_space))
+                    rows = [
+                        _box_edge(box_width, border, '╔', '╗'),
+                        _box_title(box_width, border, 'WIPING COMPLETE'),
+                        _box_edge(box_width, border, '╠', '╣'),
+                        _box_row(box_width, border, ('', "Total passes: "), (GREEN, str(passes))),
+                        _box_row(box_width, border, ('', "Total wiped: "), (GREEN, total_wiped)),
+                        _box_row(box_width, border, ('', "Time taken: "), (GREEN, time_str)),
+                        _box_edge(box_width, border, '╚', '╝'),
+                    ]
+                    sys.stdout.write('\n'.join(rows) + '\n')
+                    
+                except Exception as e:
+                    print(f"{RED}Error during free space wiping: {e}{RESET}")
+                    print(f"{YELLOW}Continuing with final formatting...{RESET}")
+                finally:
+                    cleanup.close()
+            else:
+                print(f"{YELLOW}Warning: Could not determine mount point for disk {disk_path}.{RESET}")
+                print(f"{YELLOW}Skipping free space wiping. The disk may not be fully secure.{RESET}")
+            
+            # Step 3: Final format to complete the secure erase
+            print("\n" + _step_banner("STEP 3: FINAL DISK FORMAT"))
+            perform_format("Final formatting")
+            
         # Complete the process
-        box_width = 65
-        print(f"\n{GREEN}{BRIGHT}╔═{'═' * box_width}╗{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} SECURE DISK ERASE COMPLETE{' ' * (box_width - 27)}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}╠═{'═' * box_width}╣{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} Disk: {GREEN}{disk_path}{' ' * (box_width - 7 - len(disk_path))}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} Filesystem: {GREEN}{filesystem.upper()}{' ' * (box_width - 13 - len(filesystem.upper()))}{GREEN}{BRIGHT}║{RESET}")
+        box_width = _box_width(65)
+        border = GREEN + BRIGHT
+        security = wipe_method_name(discarded, passes_done)
+        rows = [
+            _box_edge(box_width, border, '╔', '╗'),
+            _box_row(box_width, border, ('', "SECURE DISK ERASE COMPLETE")),
+            _box_edge(box_width, border, '╠', '╣'),
+            _box_row(box_width, border, ('', "Disk: "), (GREEN, disk_path)),
+            _box_row(box_width, border, ('', "Filesystem: "), (GREEN, filesystem.upper())),
+        ]
         if label:
-            print(f"{GREEN}{BRIGHT}║{RESET} Label: {GREEN}{label}{' ' * (box_width - 8 - len(label))}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}║{RESET} Security: {GREEN}Secure multi-pass format and free space wipe{' ' * (box_width - 52)}{GREEN}{BRIGHT}║{RESET}")
-        print(f"{GREEN}{BRIGHT}╚═{'═' * box_width}╝{RESET}")
+            rows.append(_box_row(box_width, border, ('', "Label: "), (GREEN, label)))
+        rows += [
+            _box_row(box_width, border, ('', "Security: "), (GREEN, security)),
+            _box_edge(box_width, border, '╚', '╝'),
+        ]
+        sys.stdout.write('\n' + '\n'.join(rows) + '\n')
+        
+        return discarded, passes_done
         
     except Exception as e:
         print(f"{RED}{BRIGHT}Error during secure disk erase: {e}{RESET}")
@@ -2202,6 +2946,10 @@ def format_disk(disk_path, filesystem='exfat', label=None, no_confirm=False, pas
 
 
 if __name__ == '__main__':
+    # Only the command line needs argparse (and the gettext it pulls in);
+    # the GUI imports this module without it
+    import argparse
+    
     parser = argparse.ArgumentParser(description='SecureWipe – Secure Free‑Space Wiper')
     
     # Create subparsers for different modes
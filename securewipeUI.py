@@ -23,7 +23,6 @@ import platform
 import subprocess
 from pathlib import Path
 import argparse
-import errno
 import re
 import uuid
 import hashlib
@@ -38,9 +37,53 @@ from securewipe import (
     clear_smart_data, secure_erase_enhanced, estimate_operation_time,
     format_time_human_readable, find_writable_path_for_volume, 
     get_free_space, is_path_writable, parse_size, 
-    clear_drive_cache, handle_remapped_sectors, estimate_write_speed
+    clear_drive_cache, handle_remapped_sectors, estimate_write_speed,
+    benchmark_write_speed, wipe_fill, windows_disk_number, wipe_method_name
 )
 
+_SYSTEM = platform.system()
+
+# ANSI escape sequences that the CLI functions put in their output
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# Lines kept in the log tab; older ones are dropped
+_LOG_MAX_LINES = 5000
+
+# Foreground color for each log level's tag
+_LOG_COLORS = {
+    "INFO": "black",
+    "SUCCESS": "green",
+    "WARNING": "orange",
+    "ERROR": "red"
+}
+
+
+class _QueueProgress:
+    """Stand-in for the CLI's tqdm bar that forwards wipe_fill progress to the GUI queue"""
+    def __init__(self, progress_queue, total, start_time):
+        self.progress_queue = progress_queue
+        self.total = total
+        self.start_time = start_time
+        self.n = 0
+        
+        # Fixed for the whole pass, so work them out once
+        self.scale = 100.0 / total if total > 0 else 0.0
+        self.total_str = format_size(total)
+    
+    def update(self, n):
+        self.n += n
+        progress = min(100.0, self.n * self.scale)
+        elapsed = max(1e-6, time.time() - self.start_time)
+        
+        # Everything the display needs in one message
+        self.progress_queue.put(("progress_bundle", (
+            progress,
+            f"{progress:.1f}% - {format_size(min(self.n, self.total))}/{self.total_str}",
+            f"Speed: {format_size(int(self.n / elapsed))}/s",
+            elapsed
+        )))
+
+
 class SecureWipeGUI:
     def __init__(self, root):
         self.root = root
@@ -62,7 +105,7 @@ class SecureWipeGUI:
         # Settings variables
         self.passes_var = tk.IntVar(value=3)
         self.pattern_var = tk.StringVar(value="all")
-        self.block_size_var = tk.StringVar(value="1MB")
+        self.block_size_var = tk.StringVar(value="4MB")
         self.verify_var = tk.BooleanVar(value=False)
         self.filesystem_var = tk.StringVar(value="exfat")
         self.label_var = tk.StringVar(value="")
@@ -83,6 +126,9 @@ class SecureWipeGUI:
         # Current operation details
         self.current_time_estimate = None
         self.operation_start_time = None
+        self.shown_time = None  # (elapsed, remaining) seconds last displayed
+        self.shown_progress = {}  # "main"/"pass" -> (whole percent, text) last displayed
+        self.format_result = None  # format_disk's (discarded, passes done) for the certificate
         
         # Log settings
         self.autoscroll_enabled = True
@@ -258,24 +304,34 @@ class SecureWipeGUI:
         pattern_desc_label = ttk.Label(wipe_frame, text="", font=('Arial', 8), foreground='gray')
         pattern_desc_label.grid(row=1, column=2, sticky=tk.W, padx=10, pady=5)
         
-        def update_pattern_description(*args):
-            descriptions = {
-                "all": "Random + zeroes + ones (recommended)",
-                "random": "Random data pattern",
-                "zeroes": "All zeros (0x00)",
-                "ones": "All ones (0xFF)",
-                "ticks": "Custom pattern (3===D)",
-                "haha": "Custom pattern (haha-)"
-            }
+        descriptions = {
+            "all": "Random + zeroes + ones (recommended)",
+            "random": "Random data pattern",
+            "zeroes": "All zeros (0x00)",
+            "ones": "All ones (0xFF)",
+            "ticks": "Custom pattern (3===D)",
+            "haha": "Custom pattern (haha-)"
+        }
+        pending_update = None
+        
+        def update_pattern_description():
+            nonlocal pending_update
+            pending_update = None
             pattern_desc_label.config(text=descriptions.get(self.pattern_var.get(), ""))
         
-        self.pattern_var.trace('w', update_pattern_description)
+        def schedule_pattern_description(*args):
+            # Coalesce bursts of writes into one label update 50 ms later
+            nonlocal pending_update
+            if pending_update is None:
+                pending_update = self.root.after(50, update_pattern_description)
+        
+        self.pattern_var.trace('w', schedule_pattern_description)
         update_pattern_description()  # Set initial description
         
         # Block Size
         ttk.Label(wipe_frame, text="Block Size:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
         block_combo = ttk.Combobox(wipe_frame, textvariable=self.block_size_var,
-                                 values=["512KB", "1MB", "2MB", "4MB", "8MB"], 
+                                 values=["512KB", "1MB", "2MB", "4MB", "8MB", "16MB", "32MB", "64MB"], 
                                  state="readonly", width=15)
         block_combo.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
         
@@ -291,11 +347,10 @@ class SecureWipeGUI:
         # Filesystem
         ttk.Label(format_frame, text="Filesystem:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
         
-        import platform
         fs_options = ["exfat", "fat32", "ntfs"]
-        if platform.system() == 'Darwin':
+        if _SYSTEM == 'Darwin':
             fs_options.extend(["apfs", "hfs+"])
-        elif platform.system() == 'Linux':
+        elif _SYSTEM == 'Linux':
             fs_options.extend(["ext4", "ext3", "ext2"])
             
         fs_combo = ttk.Combobox(format_frame, textvariable=self.filesystem_var,
@@ -353,43 +408,44 @@ Note: Some features may require administrative privileges and are platform-depen
         self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, height=25)
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        # Color coding based on level
+        for level, color in _LOG_COLORS.items():
+            self.log_text.tag_config(level, foreground=color)
+        
         # Clear log button
         ttk.Button(log_frame, text="Clear Log", command=self.clear_log).pack(pady=5)
         ttk.Button(log_frame, text="Save Log", command=self.save_log).pack(pady=5)
         
     def strip_ansi_codes(self, text):
         """Remove ANSI color codes from text for GUI display"""
-        import re
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        return ansi_escape.sub('', text)
+        return _ANSI_RE.sub('', text)
     
     def log_message(self, message, level="INFO"):
         """Add message to log with timestamp and level"""
+        self.write_log([(message, level)])
+    
+    def write_log(self, entries):
+        """Add (message, level) entries to the log with a single insert"""
+        if not entries:
+            return
         timestamp = time.strftime("%H:%M:%S")
-        # Strip any ANSI codes that might be in the message
-        clean_message = self.strip_ansi_codes(str(message))
         
-        # Color coding based on level
-        level_colors = {
-            "INFO": "black",
-            "SUCCESS": "green", 
-            "WARNING": "orange",
-            "ERROR": "red"
-        }
-        color = level_colors.get(level, "black")
-        
-        # Insert message with color
-        self.log_text.insert(tk.END, f"[{timestamp}] [{level}] {clean_message}\n")
+        # Text.insert takes alternating text/tag arguments, so each line
+        # gets its level's color without a tag_add per line
+        chunks = []
+        for message, level in entries:
+            # Strip any ANSI codes that might be in the message
+            clean_message = self.strip_ansi_codes(str(message))
+            chunks += [f"[{timestamp}] [{level}] {clean_message}\n", level]
+        self.log_text.insert(tk.END, *chunks)
         
-        # Apply color to the last line
-        line_start = self.log_text.index("end-2c linestart")
-        line_end = self.log_text.index("end-2c lineend")
-        self.log_text.tag_add(level, line_start, line_end)
-        self.log_text.tag_config(level, foreground=color)
+        # Keep only the newest lines so a long operation can't grow the widget forever
+        lines = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        if lines > _LOG_MAX_LINES:
+            self.log_text.delete('1.0', f'{lines - _LOG_MAX_LINES + 1}.0')
         
         if self.autoscroll_enabled:
             self.log_text.see(tk.END)
-        self.root.update_idletasks()
         
     def clear_log(self):
         """Clear the log display"""
@@ -429,20 +485,43 @@ Note: Some features may require administrative privileges and are platform-depen
             self.log_message("Refreshing drive list...")
             self.drives = get_physical_drives()
             
-            # Clear existing items
-            for item in self.drive_tree.get_children():
-                self.drive_tree.delete(item)
-                
-            # Add drives to tree
+            # One row per device (selection only ever picks the first drive
+            # with a device anyway); the free space string is kept on the
+            # drive so selecting it later needs no formatting
+            rows = {}
             for drive in self.drives:
-                self.drive_tree.insert("", tk.END, values=(
+                drive['free_human'] = format_size(drive['free'])
+                rows.setdefault(drive['device'], (
                     drive['device'],
                     drive['name'],
                     drive['size_human'],
-                    format_size(drive['free']),
+                    drive['free_human'],
                     drive['mountpoint'],
                     drive['fstype']
                 ))
+            
+            # Update the tree in place, keyed by device: only rows that
+            # vanished, appeared or changed touch the widget, and the
+            # current selection survives the refresh
+            for item in self.drive_tree.get_children():
+                if item not in rows:
+                    self.drive_tree.delete(item)
+            for index, (device, values) in enumerate(rows.items()):
+                if not self.drive_tree.exists(device):
+                    self.drive_tree.insert("", index, iid=device, values=values)
+                elif tuple(map(str, self.drive_tree.item(device, 'values'))) != tuple(map(str, values)):
+                    self.drive_tree.item(device, values=values)
+            
+            # Point the selection at the fresh scan of the same device
+            if self.selected_drive:
+                selected = self.selected_drive['device']
+                self.selected_drive = next((d for d in self.drives if d['device'] == selected), None)
+                if self.selected_drive:
+                    self.update_drive_details()
+                else:
+                    # The drive went away; don't leave its operations armed
+                    self.wipe_btn.config(state=tk.DISABLED)
+                    self.format_btn.config(state=tk.DISABLED)
                 
             self.log_message(f"Found {len(self.drives)} drives", "SUCCESS")
             
@@ -457,8 +536,8 @@ Note: Some features may require administrative privileges and are platform-depen
         """Handle drive selection"""
         selection = self.drive_tree.selection()
         if selection:
-            item = self.drive_tree.item(selection[0])
-            device = item['values'][0]
+            # Rows are keyed by device
+            device = selection[0]
             
             # Find the selected drive
             for drive in self.drives:
@@ -483,7 +562,7 @@ Note: Some features may require administrative privileges and are platform-depen
         details = f"""Device: {self.selected_drive['device']}
 Name: {self.selected_drive['name']}
 Size: {self.selected_drive['size_human']}
-Free Space: {format_size(self.selected_drive['free'])}
+Free Space: {self.selected_drive['free_human']}
 Mount Point: {self.selected_drive['mountpoint']}
 Filesystem: {self.selected_drive['fstype']}"""
         
@@ -511,12 +590,15 @@ Filesystem: {self.selected_drive['fstype']}"""
         try:
             free_space = self.selected_drive['free']
             passes = self.passes_var.get()
-            time_estimate = estimate_operation_time(free_space, passes, include_benchmark=False, path=None)
+            # Uses a cached speed for this drive if there is one; the worker
+            # measures it when there isn't, never the Tk thread
+            time_estimate = estimate_operation_time(free_space, passes, include_benchmark=False,
+                                                    path=self.selected_drive['mountpoint'])
             
             # Confirmation dialog with time estimate
             drive_info = f"Drive: {self.selected_drive['device']}\n"
             drive_info += f"Name: {self.selected_drive['name']}\n"
-            drive_info += f"Free Space: {format_size(self.selected_drive['free'])}\n"
+            drive_info += f"Free Space: {self.selected_drive['free_human']}\n"
             drive_info += f"Passes: {self.passes_var.get()}\n"
             drive_info += f"Pattern: {self.pattern_var.get()}\n\n"
             drive_info += f"Estimated Time: {time_estimate['estimated_human']}\n"
@@ -534,7 +616,7 @@ Filesystem: {self.selected_drive['fstype']}"""
             # Fallback to original confirmation without time estimate
             drive_info = f"Drive: {self.selected_drive['device']}\n"
             drive_info += f"Name: {self.selected_drive['name']}\n"
-            drive_info += f"Free Space: {format_size(self.selected_drive['free'])}\n"
+            drive_info += f"Free Space: {self.selected_drive['free_human']}\n"
             drive_info += f"Passes: {self.passes_var.get()}\n"
             drive_info += f"Pattern: {self.pattern_var.get()}"
             
@@ -608,6 +690,9 @@ Filesystem: {self.selected_drive['fstype']}"""
         self.operation_running = True
         self.operation_type = operation_type
         self.operation_start_time = time.time()
+        self.shown_time = None
+        self.shown_progress = {}
+        self.format_result = None
         
         # Update UI
         self.wipe_btn.config(state=tk.DISABLED)
@@ -618,7 +703,7 @@ Filesystem: {self.selected_drive['fstype']}"""
         self.progress_var.set(f"Starting {operation_type} operation...")
         
         # Display time estimate if available
-        if hasattr(self, 'current_time_estimate') and self.current_time_estimate:
+        if self.current_time_estimate:
             self.time_estimate_var.set(f"Estimated time: {self.current_time_estimate['estimated_human']} | "
                                      f"Expected completion: {self.current_time_estimate['completion_time']}")
         else:
@@ -627,24 +712,36 @@ Filesystem: {self.selected_drive['fstype']}"""
         self.progress_bar.config(mode='indeterminate')
         self.progress_bar.start()
         
+        # Read the settings here on the Tk thread; the worker only gets copies
+        params = {
+            'passes': self.passes_var.get(),
+            'pattern': self.pattern_var.get(),
+            'verify': self.verify_var.get(),
+        }
+        
         # Start operation thread
         if operation_type == "wipe":
-            self.operation_thread = threading.Thread(target=self.wipe_thread)
+            params['mount_point'] = self.selected_drive['mountpoint']
+            params['block_size'] = self.get_block_size_bytes()
+            self.operation_thread = threading.Thread(target=self.wipe_thread, args=(params,))
         else:  # format
-            self.operation_thread = threading.Thread(target=self.format_thread)
+            params['disk_path'] = self.selected_drive['device']
+            params['filesystem'] = self.filesystem_var.get()
+            params['label'] = self.label_var.get() or None
+            self.operation_thread = threading.Thread(target=self.format_thread, args=(params,))
             
         self.operation_thread.daemon = True
         self.operation_thread.start()
         
-    def wipe_thread(self):
+    def wipe_thread(self, params):
         """Thread function for wiping free space"""
         try:
             # Get parameters
-            passes = self.passes_var.get()
-            pattern = self.pattern_var.get()
-            block_size = self.get_block_size_bytes()
-            verify = self.verify_var.get()
-            mount_point = self.selected_drive['mountpoint']
+            passes = params['passes']
+            pattern = params['pattern']
+            block_size = params['block_size']
+            verify = params['verify']
+            mount_point = params['mount_point']
             
             self.progress_queue.put(("log", f"Starting free space wipe on {mount_point}"))
             self.progress_queue.put(("log", f"Passes: {passes}, Pattern: {pattern}, Block size: {format_size(block_size)}"))
@@ -652,6 +749,8 @@ Filesystem: {self.selected_drive['fstype']}"""
             # Get free space and time estimate
             try:
                 free_space = get_free_space(mount_point)
+                # Measure the target once if no recent speed is cached for it
+                estimate_write_speed(mount_point)
                 time_estimate = estimate_operation_time(free_space, passes, include_benchmark=False, path=mount_point)
                 self.progress_queue.put(("log", f"Free space: {format_size(free_space)}"))
                 self.progress_queue.put(("log", f"Estimated time: {time_estimate['estimated_human']}"))
@@ -667,18 +766,18 @@ Filesystem: {self.selected_drive['fstype']}"""
             self.progress_queue.put(("error", f"Error during wiping: {e}"))
             
             
-    def format_thread(self):
+    def format_thread(self, params):
         try:
             # Gather parameters
-            disk_path = self.selected_drive['device']
-            filesystem = self.filesystem_var.get()
-            label = self.label_var.get() or None
-            passes = self.passes_var.get()
-            pattern = self.pattern_var.get()
-            verify = self.verify_var.get()
+            disk_path = params['disk_path']
+            filesystem = params['filesystem']
+            label = params['label']
+            passes = params['passes']
+            pattern = params['pattern']
+            verify = params['verify']
 
             # Use the wrapper that resolves platform-specific targets and calls core formatter
-            self.perform_disk_format(
+            self.format_result = self.perform_disk_format(
                 disk_path,
                 filesystem,
                 label,
@@ -710,9 +809,6 @@ Filesystem: {self.selected_drive['fstype']}"""
         # Update UI
         self.wipe_btn.config(state=tk.NORMAL if self.selected_drive else tk.DISABLED)
         self.format_btn.config(state=tk.NORMAL if self.selected_drive else tk.DISABLED)
-        # Some builds may not define benchmark button; guard access
-        if hasattr(self, 'benchmark_btn'):
-            self.benchmark_btn.config(state=tk.NORMAL if self.selected_drive else tk.DISABLED)
         self.stop_btn.config(state=tk.DISABLED)
 # ---------------------------------------------------------------------------------
         # self.certificate_btn.config(state=tk.NORMAL)
@@ -731,102 +827,129 @@ Filesystem: {self.selected_drive['fstype']}"""
         self.speed_info_var.set("")
         self.pass_progress_var.set("")
         self.pass_progress_bar['value'] = 0
+        self.shown_progress = {}
         
         # Refresh drives to update free space
         self.refresh_drives()
         
     def update_progress_with_time(self, elapsed_time):
         """Update progress display with elapsed time information"""
-        if hasattr(self, 'current_time_estimate') and self.current_time_estimate:
-            elapsed_str = format_time_human_readable(elapsed_time, abbreviated=True)
+        if self.current_time_estimate:
             remaining_estimate = max(0, self.current_time_estimate['estimated_seconds'] - elapsed_time)
+            
+            # The label only shows whole seconds; skip formatting when neither changed
+            shown = (int(elapsed_time), int(remaining_estimate))
+            if shown == self.shown_time:
+                return
+            self.shown_time = shown
+            
+            elapsed_str = format_time_human_readable(elapsed_time, abbreviated=True)
             remaining_str = format_time_human_readable(remaining_estimate, abbreviated=True)
             
             self.time_estimate_var.set(f"Elapsed: {elapsed_str} | Remaining: ~{remaining_str}")
     
+    def set_progress(self, which, percent, text=None):
+        """Set the "main" or "pass" progress bar (and label), skipping writes that change nothing shown"""
+        if which == "main":
+            bar, var = self.progress_bar, self.progress_var
+        else:
+            bar, var = self.pass_progress_bar, self.pass_progress_var
+        percent = int(percent)
+        last_percent, last_text = self.shown_progress.get(which, (None, None))
+        if percent != last_percent:
+            bar.config(mode='determinate', value=percent)
+        if text is not None and text != last_text:
+            var.set(text)
+        else:
+            text = last_text
+        self.shown_progress[which] = (percent, text)
+    
     def check_progress_queue(self):
         """Check for progress updates from worker threads"""
+        # Log lines are collected and added together once the queue is drained
+        pending_log = []
+        busy = False
         try:
             while True:
                 msg_type, message = self.progress_queue.get_nowait()
+                busy = True
                 
                 if msg_type == "status":
                     self.progress_var.set(message)
+                    self.shown_progress.pop("main", None)
                 elif msg_type == "log":
-                    self.log_message(message)
-                elif msg_type == "progress":
-                    # # message should be a percentage (0-100)
-                    # self.progress_bar.config(mode='determinate')
-                    # self.progress_bar['value'] = message
-                    self.progress_bar.config(mode='determinate')
-                    # Convert string like "45% - Formatting simulation" to numeric 45
-                    if isinstance(message, str):
-                        if "%" in message:
-                            try:
-                                percent = float(message.split("%")[0])
-                            except ValueError:
-                                percent = 0
-                        else:
-                            try:
-                                percent = float(message)
-                            except ValueError:
-                                percent = 0
-                        self.progress_bar['value'] = percent
-                        self.progress_var.set(message)   # show text in label
-                    else:
-                        self.progress_bar['value'] = float(message)
+                    # message: text, or (text, level)
+                    pending_log.append(message if isinstance(message, tuple) else (message, "INFO"))
+                elif msg_type == "info":
+                    # message: (title, text) for a popup
+                    self.root.after(0, messagebox.showinfo, *message)
+                elif msg_type == "progress_bundle":
+                    # message: (percent, progress text, speed text, elapsed seconds)
+                    percent, text, speed, elapsed = message
+                    self.set_progress("main", percent, text)
+                    self.set_progress("pass", percent)
+                    self.speed_info_var.set(speed)
+                    self.update_progress_with_time(elapsed)
                 elif msg_type == "pass_start":
                     # message: (current_pass, total_passes)
                     try:
                         current_pass, total_passes = message
-                        self.pass_progress_var.set(f"Pass {current_pass}/{total_passes}")
-                        self.pass_progress_bar['value'] = 0
-                    except Exception:
-                        pass
-                elif msg_type == "pass_progress":
-                    try:
-                        self.pass_progress_bar['value'] = float(message)
+                        self.set_progress("pass", 0,
+                                          f"Pass {current_pass}/{total_passes}")
                     except Exception:
                         pass
-                elif msg_type == "speed":
-                    # message: formatted speed/time string
-                    self.speed_info_var.set(message)
-                elif msg_type == "time_update":
-                    # message should be elapsed time in seconds
-                    self.update_progress_with_time(message)
                 elif msg_type == "complete":
-                    self.log_message(message)
+                    pending_log.append((message, "INFO"))
+                    # finish_operation logs the drive refresh straight
+                    # away, so the lines before it go out first
+                    self.write_log(pending_log)
+                    pending_log = []
                     self.progress_var.set(message)
                     # Ensure status/progress are reset before popup
                     self.finish_operation()
-                    messagebox.showinfo("Success", message)
-                    # Enable certificate button on success
-                    print("Operation complete, trying to enabling certificate button")
-                    try:
-                        time.sleep(1)
-                        self.certificate_btn.config(state=tk.NORMAL)
-# ---------------------------------------------------------------------------------------------
-                    except Exception:
-                        print("Failed to enable certificate button")
-                        pass
+                    self.root.after(0, self.show_completion, message)
                 elif msg_type == "error":
-                    self.log_message(f"ERROR: {message}")
+                    pending_log.append((f"ERROR: {message}", "INFO"))
+                    self.write_log(pending_log)
+                    pending_log = []
                     self.progress_var.set("Error occurred")
                     # Ensure status/progress are reset before popup
                     self.finish_operation()
-                    messagebox.showerror("Error", message)
+                    self.root.after(0, messagebox.showerror, "Error", message)
                     # Keep certificate disabled on error
                     try:
                         self.certificate_btn.config(state=tk.DISABLED)
                     except Exception:
                         pass
-                    self.finish_operation()
                     
         except queue.Empty:
             pass
+        
+        # Popups are deferred with after(0) so the whole burst is drawn in one
+        # pass here, log included, before any of them block
+        self.write_log(pending_log)
+        if busy:
+            self.root.update_idletasks()
             
-        # Schedule next check
-        self.root.after(100, self.check_progress_queue)
+        # Schedule next check: every 100 ms while something is reporting,
+        # otherwise only a few times a second so an idle window stays idle
+        self.root.after(100 if busy or self.operation_running else 500, self.check_progress_queue)
+
+    def show_completion(self, message):
+        """Report a finished operation"""
+        messagebox.showinfo("Success", message)
+        # Enable certificate button on success, a second later
+        # without holding up the event loop
+        print("Operation complete, trying to enabling certificate button")
+        self.root.after(1000, self.enable_certificate_button)
+
+    def enable_certificate_button(self):
+        """Allow a certificate to be generated for the finished operation"""
+        try:
+            self.certificate_btn.config(state=tk.NORMAL)
+# ---------------------------------------------------------------------------------------------
+        except Exception:
+            print("Failed to enable certificate button")
 
     def benchmark_drive_speed(self):
         """Run drive speed benchmark"""
@@ -838,24 +961,25 @@ Filesystem: {self.selected_drive['fstype']}"""
             messagebox.showwarning("Warning", "An operation is already running")
             return
         
-        # Run benchmark in thread
+        # Run benchmark in thread; like the operation threads it only
+        # reports through the progress queue, never touching Tk itself
+        mount_point = self.selected_drive['mountpoint']
+        
         def benchmark_thread():
             try:
-                mount_point = self.selected_drive['mountpoint']
-                
-                self.log_message(f"Starting speed benchmark on {mount_point}", "INFO")
+                self.progress_queue.put(("log", (f"Starting speed benchmark on {mount_point}", "INFO")))
                 
                 speed = benchmark_write_speed(mount_point, test_size=50*1024*1024)  # 50MB test
                 
                 if speed:
                     speed_mb = speed / (1024 * 1024)
-                    self.log_message(f"Benchmark complete: {speed_mb:.2f} MB/s", "SUCCESS")
-                    messagebox.showinfo("Benchmark Complete", f"Write Speed: {speed_mb:.2f} MB/s")
+                    self.progress_queue.put(("log", (f"Benchmark complete: {speed_mb:.2f} MB/s", "SUCCESS")))
+                    self.progress_queue.put(("info", ("Benchmark Complete", f"Write Speed: {speed_mb:.2f} MB/s")))
                 else:
-                    self.log_message("Benchmark failed", "ERROR")
+                    self.progress_queue.put(("log", ("Benchmark failed", "ERROR")))
                     
             except Exception as e:
-                self.log_message(f"Benchmark error: {e}", "ERROR")
+                self.progress_queue.put(("log", (f"Benchmark error: {e}", "ERROR")))
         
         thread = threading.Thread(target=benchmark_thread)
         thread.daemon = True
@@ -888,7 +1012,7 @@ Filesystem: {self.selected_drive['fstype']}"""
         self.status_label.pack(side=tk.LEFT)
         
         # System info
-        system_info = f"Platform: {platform.system()} | Python: {platform.python_version()}"
+        system_info = f"Platform: {_SYSTEM} | Python: {platform.python_version()}"
         ttk.Label(self.status_bar, text=system_info, font=('Arial', 8)).pack(side=tk.RIGHT)
 
     def apply_preset(self, preset_type):
@@ -949,57 +1073,20 @@ Filesystem: {self.selected_drive['fstype']}"""
                     self.progress_queue.put(("log", "No free space available to wipe"))
                     break
                 
-                # Generate pattern data
-                if mode == 'zeroes':
-                    data = b'\x00' * block_size
-                elif mode == 'ones':
-                    data = b'\xFF' * block_size
-                elif mode == 'ticks':
-                    pattern_bytes = b'3===D'
-                    data = (pattern_bytes * (block_size // len(pattern_bytes) + 1))[:block_size]
-                elif mode == 'haha':
-                    pattern_bytes = b'haha-'
-                    data = (pattern_bytes * (block_size // len(pattern_bytes) + 1))[:block_size]
-                else:  # random
-                    data = os.urandom(block_size)
-                
-                # Write data to fill free space
-                written = 0
+                # The shared fill keeps several writes in flight at once and
+                # reports back about twice a second
+                progress = _QueueProgress(self.progress_queue, free_space, self.operation_start_time)
+                time_estimate = self.current_time_estimate
+                speed = time_estimate['estimated_speed'] if time_estimate else estimate_write_speed(root_path)
                 with open(fname, 'wb') as f:
-                    while True:
-                        try:
-                            # Write a chunk
-                            if mode == 'random':
-                                chunk = os.urandom(block_size)
-                                f.write(chunk)
-                            else:
-                                f.write(data)
-                            written += block_size
-                        except OSError as e:
-                            # Stop on no space left on device
-                            if hasattr(e, 'errno') and e.errno in (errno.ENOSPC, errno.EFBIG):
-                                break
-                            else:
-                                raise
-                        
-                        # Calculate progress against initial free space
-                        progress = min(100.0, (written / free_space) * 100.0) if free_space > 0 else 0.0
-                        self.progress_queue.put(("progress", f"{progress:.1f}% - {format_size(min(written, free_space))}/{format_size(free_space)}"))
-                        self.progress_queue.put(("pass_progress", progress))
-                        
-                        # Update speed/time approximately twice per second
-                        elapsed = max(1e-6, time.time() - self.operation_start_time)
-                        speed_bps = written / elapsed
-                        speed_str = f"Speed: {format_size(int(speed_bps))}/s"
-                        self.progress_queue.put(("speed", speed_str))
-                        self.progress_queue.put(("time_update", elapsed))
+                    written, error = wipe_fill(f, mode, free_space, block_size, progress, speed,
+                                               verify=verify)
+                if error is not None:
+                    raise error
                 
-                # Verify if requested
+                # With verify set the fill was read back before it was removed
                 if verify:
-                    self.progress_queue.put(("log", f"Verifying pass {p+1}"))
-                    # Simple verification - check file size
-                    if os.path.getsize(fname) != written:
-                        raise Exception(f"Verification failed for pass {p+1}")
+                    self.progress_queue.put(("log", f"Pass {p+1} verified"))
                 
                 # Clean up temp file
                 try:
@@ -1018,7 +1105,7 @@ Filesystem: {self.selected_drive['fstype']}"""
     def perform_disk_format(self, disk_path, filesystem, label, passes, pattern, verify):
         """Perform real disk formatting using core format_disk without CLI confirmations"""
         try:
-            system = platform.system()
+            system = _SYSTEM
             target = disk_path
             # On Windows, map selected drive letter to physical disk number expected by core format_disk
             if system == 'Windows':
@@ -1032,13 +1119,19 @@ Filesystem: {self.selected_drive['fstype']}"""
                         if len(mp) >= 2 and mp[1] == ':':
                             drive_letter = mp[0]
                     if drive_letter:
-                        ps_cmd = f"(Get-Partition -DriveLetter {drive_letter} | Get-Disk).Number"
-                        result = subprocess.check_output(['powershell', '-Command', ps_cmd], stderr=subprocess.STDOUT).decode('utf-8').strip()
-                        # Disk number should be an integer on its own line
-                        num_match = re.search(r"(\d+)", result)
-                        if num_match:
+                        # Ask the volume itself (one DeviceIoControl); PowerShell
+                        # is only the fallback, it takes far longer to start
+                        disk_number = windows_disk_number(f"{drive_letter}:\\")
+                        if disk_number is not None:
                             # Pass numeric disk id; core will handle mountpoint resolution
-                            target = num_match.group(1)
+                            target = str(disk_number)
+                        else:
+                            ps_cmd = f"(Get-Partition -DriveLetter {drive_letter} | Get-Disk).Number"
+                            result = subprocess.check_output(['powershell', '-Command', ps_cmd], stderr=subprocess.STDOUT).decode('utf-8').strip()
+                            # Disk number should be an integer on its own line
+                            num_match = re.search(r"(\d+)", result)
+                            if num_match:
+                                target = num_match.group(1)
                 except Exception as e:
                     self.progress_queue.put(("log", f"Warning: Could not resolve disk number automatically: {e}"))
             
@@ -1046,7 +1139,7 @@ Filesystem: {self.selected_drive['fstype']}"""
             self.progress_queue.put(("status", f"Formatting started: {target} ({filesystem.upper()})"))
             self.progress_bar = self.progress_bar  # keep reference
             # Call core formatting (no_confirm=True to suppress CLI dialogs)
-            format_disk(target, filesystem=filesystem, label=label, no_confirm=True, passes=passes, pattern=pattern, verify=verify)
+            return format_disk(target, filesystem=filesystem, label=label, no_confirm=True, passes=passes, pattern=pattern, verify=verify)
             
         except Exception as e:
             raise e
@@ -1082,6 +1175,10 @@ Filesystem: {self.selected_drive['fstype']}"""
                 passes_count = int(self.passes_var.get())
             except Exception:
                 passes_count = 0
+            # A disk format reports what it actually did; an SSD may only
+            # have been discarded
+            if self.format_result is not None:
+                discarded, passes_count = self.format_result
             passes = f"{passes_count} passes"
 
             # Determine current free space on selected mount (human-readable)
@@ -1097,7 +1194,12 @@ Filesystem: {self.selected_drive['fstype']}"""
                 except Exception:
                     free_human = "Unknown"
 
-            method = "DoD 5220.22-M"
+            if self.format_result is not None:
+                method = wipe_method_name(*self.format_result)
+                wipe_method = method
+            else:
+                method = "DoD 5220.22-M"
+                wipe_method = f"{method} ({passes})"
             from datetime import datetime, timezone, timedelta
             # Define IST timezone (UTC + 5:30)
             IST = timezone(timedelta(hours=5, minutes=30))
@@ -1112,7 +1214,7 @@ Filesystem: {self.selected_drive['fstype']}"""
                 "--cert_id", certificate_id,
                 "--device_model", model or "",
                 "--device_sno", serial or "",
-                "--wipe_method", f"{method} ({passes})",
+                "--wipe_method", wipe_method,
                 "--timestamp", ts,
                 "--signature", f"sha256:{hashed}"
             ]
@@ -1154,7 +1256,7 @@ Filesystem: {self.selected_drive['fstype']}"""
         try:
             if not self.selected_drive:
                 return (None, None)
-            system = platform.system()
+            system = _SYSTEM
             if system == 'Windows':
                 try:
                     disk_num = None
@@ -1274,7 +1376,7 @@ if __name__ == "__main__":
 
     # On Windows, auto-relaunch with elevation if not already elevated
     try:
-        if platform.system() == 'Windows':
+        if _SYSTEM == 'Windows':
             import ctypes
             is_admin = bool(ctypes.windll.shell32.IsUserAnAdmin())
             if not is_admin and not args.elevated: